@@ -1,20 +1,26 @@
 # Standard library imports
+import atexit
 import configparser
+import functools
 import json
 import logging
 import os
+
 import sys
 import platform
 import threading
 import time
-from collections import OrderedDict
+import wave
+from collections import ChainMap, OrderedDict, deque
+from collections.abc import Mapping
 from enum import Enum
 from threading import Thread
+from types import MappingProxyType
 
 # Third-party imports
 from PyQt5 import QtCore, QtMultimedia
-from PyQt5.QtMultimedia import QAudioDeviceInfo, QAudio, QAudioFormat, QAudioOutput
-from PyQt5.QtCore import QIODevice, QFile, QThread, pyqtSignal, QTimer, Qt, QObject
+from PyQt5.QtMultimedia import QAudioDeviceInfo, QAudio, QAudioFormat, QAudioOutput, QSoundEffect
+from PyQt5.QtCore import QCoreApplication, QIODevice, QFile, QBuffer, QThread, QThreadPool, pyqtSignal, QTimer, Qt, QObject
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import (QAction, QCheckBox, QComboBox, QDialog, QGridLayout,
                              QGroupBox, QHBoxLayout, QLabel, QLineEdit, QMessageBox,
@@ -23,11 +29,25 @@ from PyQt5.QtWidgets import (QAction, QCheckBox, QComboBox, QDialog, QGridLayout
 from nava import play
 import keyboard
 import mouse
+try:
+    import orjson
+except ImportError:  # Optional, the stdlib json module is used instead
+    orjson = None
 # Local application/library specific imports
 import pressagio.callback
+import pressagio.dbconnector
 import pressagio
 import icons_rc
 
+# Resolved once; realpath stats every path component
+_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+_PRESSAGIO_INI = os.path.join(_MODULE_DIR, "res", "morsewriter_pressagio.ini")
+
+# Parsed once and shared by every TypeState; pressagio only reads from it
+_PRESSAGIO_CFG = configparser.ConfigParser()
+_PRESSAGIO_CFG.read(_PRESSAGIO_INI)
+
+
 def get_user_data_dir(app_name="MorseWriter"):
     """
     Returns the appropriate directory for storing user data based on the OS and whether the app is frozen.
@@ -42,12 +62,35 @@ def get_user_data_dir(app_name="MorseWriter"):
             return os.path.join(os.path.expanduser('~/.config/'), app_name, 'user_data')
     else:
         # Use a local directory when running in development
-        return os.path.join(os.path.dirname(os.path.realpath(__file__)), 'user_data')
+        return os.path.join(_MODULE_DIR, 'user_data')
+
+
+def _json_default(obj):
+    # Lets layered configs (ChainMap, MappingProxyType) be saved as plain objects
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# JSON helpers working on bytes, backed by orjson when it is installed
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2)
+else:
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, default=_json_default, indent=4).encode('utf-8')
+
 
+_USER_DATA_DIR = get_user_data_dir()
 
 # Configure basic logger
-logfile = os.path.join(get_user_data_dir(), "morsewriter-log.log")
+logfile = os.path.join(_USER_DATA_DIR, "morsewriter-log.log")
 logging.basicConfig(level=logging.DEBUG, filename=logfile, filemode='w',format='%(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # # If you want to the console
 # logging.basicConfig(level=logging.DEBUG,format='%(name)s - %(levelname)s - %(message)s')
@@ -60,8 +103,11 @@ currentY = 0
 pressingKey = False
 typestate = None
 
-# If configfile file is lost.. 
-DEFAULT_CONFIG = {
+# Bumped when the stored config format changes; 2 stores numbers as numbers
+CONFIG_SCHEMA_VERSION = 2
+
+# If configfile file is lost.. (read-only, copy or layer over it to change settings)
+DEFAULT_CONFIG = MappingProxyType({
   "keylen": 1,
   "keyone": "SPACE",
   "keytwo": "ENTER",
@@ -80,9 +126,217 @@ DEFAULT_CONFIG = {
   "winxaxis": "left",
   "winyaxis": "top",
   "winposx": 10,
-  "winposy": 10
-}
+  "winposy": 10,
+  "schema_version": CONFIG_SCHEMA_VERSION
+})
+
+
+class KeyStroke:
+    __slots__ = ('name', 'label', 'key_code', 'character')
+
+    def __init__(self, name, label, key_code, character):
+        self.name = name
+        self.label = label
+        self.key_code = key_code
+        self.character = character
+
 
+# Static key table shared by every ConfigManager; read-only so it can be shared safely
+_KEY_DATA = MappingProxyType({
+    "A": {'label': 'a', 'key_code': 'a', 'character': 'a', 'arg': None},
+    "B": {'label': 'b', 'key_code': 'b', 'character': 'b', 'arg': None},
+    "C": {'label': 'c', 'key_code': 'c', 'character': 'c', 'arg': None},
+    "D": {'label': 'd', 'key_code': 'd', 'character': 'd', 'arg': None},
+    "E": {'label': 'e', 'key_code': 'e', 'character': 'e', 'arg': None},
+    "F": {'label': 'f', 'key_code': 'f', 'character': 'f', 'arg': None},
+    "G": {'label': 'g', 'key_code': 'g', 'character': 'g', 'arg': None},
+    "H": {'label': 'h', 'key_code': 'h', 'character': 'h', 'arg': None},
+    "I": {'label': 'i', 'key_code': 'i', 'character': 'i', 'arg': None},
+    "J": {'label': 'j', 'key_code': 'j', 'character': 'j', 'arg': None},
+    "K": {'label': 'k', 'key_code': 'k', 'character': 'k', 'arg': None},
+    "L": {'label': 'l', 'key_code': 'l', 'character': 'l', 'arg': None},
+    "M": {'label': 'm', 'key_code': 'm', 'character': 'm', 'arg': None},
+    "N": {'label': 'n', 'key_code': 'n', 'character': 'n', 'arg': None},
+    "O": {'label': 'o', 'key_code': 'o', 'character': 'o', 'arg': None},
+    "P": {'label': 'p', 'key_code': 'p', 'character': 'p', 'arg': None},
+    "Q": {'label': 'q', 'key_code': 'q', 'character': 'q', 'arg': None},
+    "R": {'label': 'r', 'key_code': 'r', 'character': 'r', 'arg': None},
+    "S": {'label': 's', 'key_code': 's', 'character': 's', 'arg': None},
+    "T": {'label': 't', 'key_code': 't', 'character': 't', 'arg': None},
+    "U": {'label': 'u', 'key_code': 'u', 'character': 'u', 'arg': None},
+    "V": {'label': 'v', 'key_code': 'v', 'character': 'v', 'arg': None},
+    "W": {'label': 'w', 'key_code': 'w', 'character': 'w', 'arg': None},
+    "X": {'label': 'x', 'key_code': 'x', 'character': 'x', 'arg': None},
+    "Y": {'label': 'y', 'key_code': 'y', 'character': 'y', 'arg': None},
+    "Z": {'label': 'z', 'key_code': 'z', 'character': 'z', 'arg': None},
+    "ONE": {'label': '1', 'key_code': '1', 'character': '1', 'arg': None},
+    "TWO": {'label': '2', 'key_code': '2', 'character': '2', 'arg': None},
+    "THREE": {'label': '3', 'key_code': '3', 'character': '3', 'arg': None},
+    "FOUR": {'label': '4', 'key_code': '4', 'character': '4', 'arg': None},
+    "FIVE": {'label': '5', 'key_code': '5', 'character': '5', 'arg': None},
+    "SIX": {'label': '6', 'key_code': '6', 'character': '6', 'arg': None},
+    "SEVEN": {'label': '7', 'key_code': '7', 'character': '7', 'arg': None},
+    "EIGHT": {'label': '8', 'key_code': '8', 'character': '8', 'arg': None},
+    "NINE": {'label': '9', 'key_code': '9', 'character': '9', 'arg': None},
+    "ZERO": {'label': '0', 'key_code': '0', 'character': '0', 'arg': None},
+    "DOT": {'label': '.', 'key_code': '.', 'character': '.', 'arg': None},
+    "COMMA": {'label': ',', 'key_code': ',', 'character': ',', 'arg': None},
+    "QUESTION": {'label': '?', 'key_code': '/', 'character': '?', 'arg': None},
+    "EXCLAMATION": {'label': '!', 'key_code': '1', 'character': '!', 'arg': None},
+    "COLON": {'label': ':', 'key_code': ';', 'character': ':', 'arg': None},
+    "SEMICOLON": {'label': ';', 'key_code': ';', 'character': ';', 'arg': None},
+    "AT": {'label': '@', 'key_code': '2', 'character': '@', 'arg': None},
+    "HASH": {'label': '#', 'key_code': '3', 'character': '#', 'arg': None},
+    "DOLLAR": {'label': '$', 'key_code': '4', 'character': '$', 'arg': None},
+    "PERCENT": {'label': '%', 'key_code': '5', 'character': '%', 'arg': None},
+    "AMPERSAND": {'label': '&', 'key_code': '7', 'character': '&', 'arg': None},
+    "STAR": {'label': '*', 'key_code': '*', 'character': '*', 'arg': None},
+    "PLUS": {'label': '+', 'key_code': '=', 'character': '+', 'arg': None},
+    "MINUS": {'label': '-', 'key_code': '-', 'character': '-', 'arg': None},
+    "EQUALS": {'label': '=', 'key_code': '=', 'character': '=', 'arg': None},
+    "FSLASH": {'label': '/', 'key_code': '/', 'character': '/', 'arg': None},
+    "BSLASH": {'label': '\\', 'key_code': '\\', 'character': '\\', 'arg': None},
+    "SINGLEQUOTE": {'label': "'", 'key_code': "'", 'character': "'", 'arg': None},
+    "DOUBLEQUOTE": {'label': '"', 'key_code': '"', 'character': '"', 'arg': None},
+    "OPENBRACKET": {'label': '(', 'key_code': '9', 'character': '(', 'arg': None},
+    "CLOSEBRACKET": {'label': ')', 'key_code': '0', 'character': ')', 'arg': None},
+    "LESSTHAN": {'label': '<', 'key_code': ',', 'character': '<', 'arg': None},
+    "MORETHAN": {'label': '>', 'key_code': '.', 'character': '>', 'arg': None},
+    "CIRCONFLEX": {'label': '^', 'key_code': '6', 'character': '^', 'arg': None},
+    "ENTER": {'label': 'enter', 'key_code': 'enter', 'character': '\n', 'arg': None},
+    "SPACE": {'label': 'space', 'key_code': 'space', 'character': ' ', 'arg': None},
+    "BACKSPACE": {'label': 'bckspc', 'key_code': 'backspace', 'character': '\x08', 'arg': None},
+    "TAB": {'label': 'tab', 'key_code': 'tab', 'character': '\t', 'arg': None},
+    "UNDERSCORE": {'label': 'underscore', 'key_code': '_', 'character': '_', 'arg': None},
+    "PAGEUP": {'label': 'pageup', 'key_code': 'page_up', 'character': None, 'arg': None},
+    "PAGEDOWN": {'label': 'pagedwn', 'key_code': 'page_down', 'character': None, 'arg': None},
+    "LEFTARROW": {'label': 'left', 'key_code': 'left', 'character': None, 'arg': None},
+    "RIGHTARROW": {'label': 'right', 'key_code': 'right', 'character': None, 'arg': None},
+    "UPARROW": {'label': 'up', 'key_code': 'up', 'character': None, 'arg': None},
+    "DOWNARROW": {'label': 'down', 'key_code': 'down', 'character': None, 'arg': None},
+    "ESCAPE": {'label': 'esc', 'key_code': 'esc', 'character': None, 'arg': None},
+    "HOME": {'label': 'home', 'key_code': 'home', 'character': None, 'arg': None},
+    "END": {'label': 'end', 'key_code': 'end', 'character': None, 'arg': None},
+    "DELETE": {'label': 'del', 'key_code': 'delete', 'character': None, 'arg': None},
+    "SHIFT": {'label': 'shift', 'key_code': 'shift', 'character': None, 'arg': None},
+    "RSHIFT": {'label': 'rshift', 'key_code': 'right shift', 'character': None, 'arg': None},
+    "LSHIFT": {'label': 'lshift', 'key_code': 'left shift', 'character': None, 'arg': None},
+    "CTRL": {'label': 'ctrl', 'key_code': 'trl', 'character': None, 'arg': None},
+    "RCTRL": {'label': 'rctrl', 'key_code': 'right ctrl', 'character': None, 'arg': None},
+    "LCTRL": {'label': 'lctrl', 'key_code': 'ctrl', 'character': None, 'arg': None},
+    "ALT": {'label': 'alt', 'key_code': 'alt', 'character': None, 'arg': None},
+    "INSERT": {'label': 'insert', 'key_code': 'insert', 'character': None, 'arg': None},
+    "WINDOWS": {'label': 'win', 'key_code': 'cmd', 'character': None, 'arg': None},
+    "STARTMENU": {'label': 'startmenu', 'key_code': 'start', 'character': None, 'arg': None},
+    "CAPSLOCK": {'label': 'caps', 'key_code': 'caps lock', 'character': None, 'arg': None},
+    "F1": {'label': 'F1', 'key_code': 'f1', 'character': None, 'arg': None},
+    "F2": {'label': 'F2', 'key_code': 'f2', 'character': None, 'arg': None},
+    "F3": {'label': 'F3', 'key_code': 'f3', 'character': None, 'arg': None},
+    "F4": {'label': 'F4', 'key_code': 'f4', 'character': None, 'arg': None},
+    "F5": {'label': 'F5', 'key_code': 'f5', 'character': None, 'arg': None},
+    "F6": {'label': 'F6', 'key_code': 'f6', 'character': None, 'arg': None},
+    "F7": {'label': 'F7', 'key_code': 'f7', 'character': None, 'arg': None},
+    "F8": {'label': 'F8', 'key_code': 'f8', 'character': None, 'arg': None},
+    "F9": {'label': 'F9', 'key_code': 'f9', 'character': None, 'arg': None},
+    "F10": {'label': 'F10', 'key_code': 'f10', 'character': None, 'arg': None},
+    "F11": {'label': 'F11', 'key_code': 'f11', 'character': None, 'arg': None},
+    "F12": {'label': 'F12', 'key_code': 'f12', 'character': None, 'arg': None},
+    "REPEATMODE": {'label': 'repeat', 'key_code': 'REPEATMODE', 'character': None, 'arg': 0},
+    "SOUND": {'label': 'snd', 'key_code': 'unknown', 'character': None, 'arg': 8},
+    "CODESET": {'label': 'code', 'key_code': 'unknown', 'character': None, 'arg': 9},
+    "MOUSERIGHT5": {'label': 'ms right 5', 'key_code': 'MOUSERIGHT5', 'character': None, 'arg': 2},
+    "MOUSEUP5": {'label': 'ms up 5', 'key_code': 'MOUSEUP5', 'character': None, 'arg': 3},
+    "MOUSECLICKLEFT": {'label': 'ms clkleft', 'key_code': 'MOUSECLICKLEFT', 'character': None, 'arg': 4},
+    "MOUSEDBLCLICKLEFT": {'label': 'ms dblclkleft', 'key_code': 'MOUSEDBLCLICKLEFT', 'character': None, 'arg': 5},
+    "MOUSECLKHLDLEFT": {'label': 'ms hldleft', 'key_code': 'MOUSECLKHLDLEFT', 'character': None, 'arg': 6},
+    "MOUSEUPLEFT5": {'label': 'ms leftup 5', 'key_code': 'MOUSEUPLEFT5', 'character': None, 'arg': 7},
+    "MOUSEDOWNLEFT5": {'label': 'ms leftdown 5', 'key_code': 'MOUSEDOWNLEFT5', 'character': None, 'arg': 8},
+    "MOUSERELEASEHOLD": {'label': 'ms release', 'key_code': 'MOUSERELEASEHOLD', 'character': None, 'arg': 9},
+    "MOUSELEFT5": {'label': 'ms left 5', 'key_code': 'MOUSELEFT5', 'character': None, 'arg': 0},
+    "MOUSEDOWN5": {'label': 'ms down 5', 'key_code': 'MOUSEDOWN5', 'character': None, 'arg': 1},
+    "MOUSECLICKRIGHT": {'label': 'ms clkright', 'key_code': 'MOUSECLICKRIGHT', 'character': None, 'arg': 2},
+    "MOUSEDBLCLICKRIGHT": {'label': 'ms dblclkright', 'key_code': 'MOUSEDBLCLICKRIGHT', 'character': None, 'arg': 3},
+    "MOUSECLKHLDRIGHT": {'label': 'ms hldright', 'key_code': 'MOUSECLKHLDRIGHT', 'character': None, 'arg': 4},
+    "MOUSEUPRIGHT5": {'label': 'ms rightup 5', 'key_code': 'MOUSEUPRIGHT5', 'character': None, 'arg': 5},
+    "MOUSEDOWNRIGHT5": {'label': 'ms rightdown 5', 'key_code': 'MOUSEDOWNRIGHT5', 'character': None, 'arg': 6},
+    "MOUSENORMALMODE": {'label': 'normal mode', 'key_code': 'NORMALMODE', 'character': None, 'arg': 7},
+    "MOUSEUP40": {'label': 'ms up 40', 'key_code': 'MOUSEUP40', 'character': None, 'arg': 8},
+    "MOUSEUP250": {'label': 'ms up 250', 'key_code': 'MOUSEUP250', 'character': None, 'arg': 9},
+    "MOUSEDOWN40": {'label': 'ms down 40', 'key_code': 'MOUSEDOWN40', 'character': None, 'arg': 0},
+    "MOUSEDOWN250": {'label': 'ms down 250', 'key_code': 'MOUSEDOWN250', 'character': None, 'arg': 1},
+    "MOUSELEFT40": {'label': 'ms left 40', 'key_code': 'MOUSELEFT40', 'character': None, 'arg': 2},
+    "MOUSELEFT250": {'label': 'ms left 250', 'key_code': 'MOUSELEFT250', 'character': None, 'arg': 3},
+    "MOUSERIGHT40": {'label': 'ms right 40', 'key_code': 'MOUSERIGHT40', 'character': None, 'arg': 4},
+    "MOUSERIGHT250": {'label': 'ms right 250', 'key_code': 'MOUSERIGHT250', 'character': None, 'arg': 5},
+    "MOUSEUPLEFT40": {'label': 'ms leftup 40', 'key_code': 'MOUSEUPLEFT40', 'character': None, 'arg': 6},
+    "MOUSEUPLEFT250": {'label': 'ms leftup 250', 'key_code': 'MOUSEUPLEFT250', 'character': None, 'arg': 7},
+    "MOUSEDOWNLEFT40": {'label': 'ms leftdown 40', 'key_code': 'MOUSEDOWNLEFT40', 'character': None, 'arg': 8},
+    "MOUSEDOWNLEFT250": {'label': 'ms leftdown 250', 'key_code': 'MOUSEDOWNLEFT250', 'character': None, 'arg': 9},
+    "MOUSEUPRIGHT40": {'label': 'ms rightup 40', 'key_code': 'MOUSEUPRIGHT40', 'character': None, 'arg': 0},
+    "MOUSEUPRIGHT250": {'label': 'ms rightup 250', 'key_code': 'MOUSEUPRIGHT250', 'character': None, 'arg': 1},
+    "MOUSEDOWNRIGHT40": {'label': 'ms rightdown 40', 'key_code': 'MOUSEDOWNRIGHT40', 'character': None, 'arg': 2},
+    "MOUSEDOWNRIGHT250": {'label': 'ms rightdown 250', 'key_code': 'MOUSEDOWNRIGHT250', 'character': None, 'arg': 3}
+})
+
+
+def _build_keystroke_map(key_data):
+    keystrokemap = {}
+    keystrokes = []
+    for key, data in key_data.items():
+        stroke = KeyStroke(key.upper(), data['label'], data['key_code'], data['character'])
+        keystrokes.append(stroke)
+        keystrokemap[key.upper()] = stroke
+    return keystrokes, keystrokemap
+
+
+_KEYSTROKES, _KEYSTROKEMAP = _build_keystroke_map(_KEY_DATA)
+
+# Keys offered as morse input keys in the settings
+MORSE_KEYS = ("SPACE", "ENTER", "ONE", "TWO", "Z", "F8", "F9", "RCTRL", "LCTRL", "RSHIFT", "LSHIFT", "ALT", "CTRL")
+
+# Modifier keys whose state is shown on the layout view, by their 'keyboard' library key name
+MODIFIER_KEYS = ('alt', 'shift', 'ctrl', 'caps lock')
+
+
+class AudioCue:
+    """
+    A short uncompressed WAV file decoded once into memory and played through its own
+    persistent QAudioOutput, so playing it involves no file access or decoding.
+    """
+    # Bytes buffered by the audio output, kept small so cues start promptly
+    BUFFER_SIZE = 4096
+
+    def __init__(self, file, device=None):
+        with wave.open(file, 'rb') as wav:
+            sample_width = wav.getsampwidth()
+            audio_format = QAudioFormat()
+            audio_format.setSampleRate(wav.getframerate())
+            audio_format.setChannelCount(wav.getnchannels())
+            audio_format.setSampleSize(sample_width * 8)
+            audio_format.setCodec("audio/pcm")
+            audio_format.setByteOrder(QAudioFormat.LittleEndian)
+            audio_format.setSampleType(QAudioFormat.UnSignedInt if sample_width == 1 else QAudioFormat.SignedInt)
+            pcm = wav.readframes(wav.getnframes())
+
+        if device is None or device.isNull():
+            device = QAudioDeviceInfo.defaultOutputDevice()
+        if not device.isFormatSupported(audio_format):
+            raise ValueError(f"{device.deviceName()} does not support the format of {file}")
+
+        self.buffer = QBuffer()
+        self.buffer.setData(pcm)
+        self.buffer.open(QIODevice.ReadOnly)
+        self.output = QAudioOutput(device, audio_format)
+        self.output.setBufferSize(self.BUFFER_SIZE)
+
+    def play(self):
+        # Restart from the beginning, cutting off the previous play if it is still running
+        self.output.stop()
+        self.buffer.seek(0)
+        self.output.start(self.buffer)
+
+    def stop(self):
+        self.output.stop()
 
 
 class AudioDeviceSelector(QWidget):
@@ -108,6 +362,8 @@ class AudioDeviceSelector(QWidget):
 
         self.sound_file = None
         self.player = QtMultimedia.QMediaPlayer()
+        # Short WAV cue sounds (dit/dah/typing) are kept in memory, see AudioCue
+        self.cues = {}
         self.selected_device = self.device_selector.currentData()
 
         icon = QIcon(':/morse-writer.ico')
@@ -115,18 +371,42 @@ class AudioDeviceSelector(QWidget):
 
     def device_changed(self, index):
         self.selected_device = self.device_selector.itemData(index)
+        # Cues are bound to an output device, rebuild them on next use
+        for cue in self.cues.values():
+            cue.stop()
+        self.cues.clear()
         print(f"Selected device audio device {index} : {self.selected_device.deviceName()}")
 
     def list_available_devices(self):
         default_device = QAudioDeviceInfo.defaultOutputDevice()
         self.device_selector.addItem(default_device.deviceName(), default_device)
+        seen = {default_device.deviceName()}
 
         for device in QAudioDeviceInfo.availableDevices(QAudio.AudioOutput):
-            device_names = [self.device_selector.itemText(i) for i in range(self.device_selector.count())]
-            if device.deviceName() not in device_names:
-                self.device_selector.addItem(device.deviceName(), device)
+            name = device.deviceName()
+            if name not in seen:
+                self.device_selector.addItem(name, device)
+                seen.add(name)
+
+    def load_cue(self, file):
+        cue = self.cues.get(file)
+        if cue is None and os.path.exists(file):
+            try:
+                cue = AudioCue(file, self.selected_device)
+            except (wave.Error, EOFError, ValueError) as e:
+                # Compressed WAV or unsupported format, let QSoundEffect handle it
+                logger.warning("Could not preload %s, falling back to QSoundEffect: %s", file, e)
+                cue = QSoundEffect(self)
+                cue.setSource(QtCore.QUrl.fromLocalFile(QtCore.QDir.current().absoluteFilePath(file)))
+            self.cues[file] = cue
+        return cue
 
     def play_audio(self, file):
+        if file.lower().endswith('.wav'):
+            cue = self.load_cue(file)
+            if cue is not None:
+                cue.play()
+            return
         # check here if file exist
         if os.path.exists(file):
             url = QtCore.QUrl.fromLocalFile(QtCore.QDir.current().absoluteFilePath(file))
@@ -144,195 +424,105 @@ class AudioDeviceSelector(QWidget):
             self.play_audio(self.audio_file)
 
 
+def parse_abbreviations(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = f.read()
+    return dict(line.split('\t', 1) for line in data.splitlines() if '\t' in line)
+
+
 @staticmethod
 def load_abbreviations(file_path):
     abbreviations = {}
     try:
-        logging.debug(f"[TypeState] Trying to load abbreviations from file: {file_path}")
-        with open(file_path, 'r') as f:
-            for line in f:
-                if line.strip():
-                    abbr, expansion = line.strip().split('\t')
-                    abbreviations[abbr] = expansion
+        logger.debug("[TypeState] Trying to load abbreviations from file: %s", file_path)
+        abbreviations = parse_abbreviations(file_path)
     except Exception as e:
-        logging.error(f"Failed to load abbreviations: {e}")
+        logger.error("Failed to load abbreviations: %s", e)
     return abbreviations
 
 
 @staticmethod
 def expand_abbreviation(keys, abbreviations):
-    words = keys.split()
+    # Only the last word matters, so split at most once from the right
+    words = keys.rsplit(None, 1)
+    if not words:
+        return None, None
     last_word = words[-1]
 
-    if last_word in abbreviations:
-        return abbreviations[last_word], len(last_word)
+    expansion = abbreviations.get(last_word)
+    if expansion is not None:
+        return expansion, len(last_word)
     else:
         return None,None
 
+
+def build_abbreviation_trie(abbreviations):
+    """Builds a trie of the reversed abbreviations, so the word before the caret is a walk from the root."""
+    trie = {}
+    for key, expansion in (abbreviations or {}).items():
+        node = trie
+        for char in reversed(key):
+            node = node.setdefault(char, {})
+        node[None] = expansion
+    return trie
+
+
+def walk_abbreviation_trie(trie, tail):
+    """Same result as expand_abbreviation for a tail without trailing whitespace."""
+    node = trie
+    length = 0
+    for char in reversed(tail):
+        if char.isspace():
+            break
+        node = node.get(char)
+        if node is None:
+            return None, None
+        length += 1
+    expansion = node.get(None)
+    if expansion is None:
+        return None, None
+    return expansion, length
+
 class ConfigManager:
+    # Saves requested within this many milliseconds of each other are written once
+    SAVE_DELAY_MS = 250
+
     def __init__(self, config_file=None, default_config=DEFAULT_CONFIG):
-        self.key_data = {
-        "A": {'label': 'a', 'key_code': 'a', 'character': 'a', 'arg': None},
-        "B": {'label': 'b', 'key_code': 'b', 'character': 'b', 'arg': None},
-        "C": {'label': 'c', 'key_code': 'c', 'character': 'c', 'arg': None},
-        "D": {'label': 'd', 'key_code': 'd', 'character': 'd', 'arg': None},
-        "E": {'label': 'e', 'key_code': 'e', 'character': 'e', 'arg': None},
-        "F": {'label': 'f', 'key_code': 'f', 'character': 'f', 'arg': None},
-        "G": {'label': 'g', 'key_code': 'g', 'character': 'g', 'arg': None},
-        "H": {'label': 'h', 'key_code': 'h', 'character': 'h', 'arg': None},
-        "I": {'label': 'i', 'key_code': 'i', 'character': 'i', 'arg': None},
-        "J": {'label': 'j', 'key_code': 'j', 'character': 'j', 'arg': None},
-        "K": {'label': 'k', 'key_code': 'k', 'character': 'k', 'arg': None},
-        "L": {'label': 'l', 'key_code': 'l', 'character': 'l', 'arg': None},
-        "M": {'label': 'm', 'key_code': 'm', 'character': 'm', 'arg': None},
-        "N": {'label': 'n', 'key_code': 'n', 'character': 'n', 'arg': None},
-        "O": {'label': 'o', 'key_code': 'o', 'character': 'o', 'arg': None},
-        "P": {'label': 'p', 'key_code': 'p', 'character': 'p', 'arg': None},
-        "Q": {'label': 'q', 'key_code': 'q', 'character': 'q', 'arg': None},
-        "R": {'label': 'r', 'key_code': 'r', 'character': 'r', 'arg': None},
-        "S": {'label': 's', 'key_code': 's', 'character': 's', 'arg': None},
-        "T": {'label': 't', 'key_code': 't', 'character': 't', 'arg': None},
-        "U": {'label': 'u', 'key_code': 'u', 'character': 'u', 'arg': None},
-        "V": {'label': 'v', 'key_code': 'v', 'character': 'v', 'arg': None},
-        "W": {'label': 'w', 'key_code': 'w', 'character': 'w', 'arg': None},
-        "X": {'label': 'x', 'key_code': 'x', 'character': 'x', 'arg': None},
-        "Y": {'label': 'y', 'key_code': 'y', 'character': 'y', 'arg': None},
-        "Z": {'label': 'z', 'key_code': 'z', 'character': 'z', 'arg': None},
-        "ONE": {'label': '1', 'key_code': '1', 'character': '1', 'arg': None},
-        "TWO": {'label': '2', 'key_code': '2', 'character': '2', 'arg': None},
-        "THREE": {'label': '3', 'key_code': '3', 'character': '3', 'arg': None},
-        "FOUR": {'label': '4', 'key_code': '4', 'character': '4', 'arg': None},
-        "FIVE": {'label': '5', 'key_code': '5', 'character': '5', 'arg': None},
-        "SIX": {'label': '6', 'key_code': '6', 'character': '6', 'arg': None},
-        "SEVEN": {'label': '7', 'key_code': '7', 'character': '7', 'arg': None},
-        "EIGHT": {'label': '8', 'key_code': '8', 'character': '8', 'arg': None},
-        "NINE": {'label': '9', 'key_code': '9', 'character': '9', 'arg': None},
-        "ZERO": {'label': '0', 'key_code': '0', 'character': '0', 'arg': None},
-        "DOT": {'label': '.', 'key_code': '.', 'character': '.', 'arg': None},
-        "COMMA": {'label': ',', 'key_code': ',', 'character': ',', 'arg': None},
-        "QUESTION": {'label': '?', 'key_code': '/', 'character': '?', 'arg': None},
-        "EXCLAMATION": {'label': '!', 'key_code': '1', 'character': '!', 'arg': None},
-        "COLON": {'label': ':', 'key_code': ';', 'character': ':', 'arg': None},
-        "SEMICOLON": {'label': ';', 'key_code': ';', 'character': ';', 'arg': None},
-        "AT": {'label': '@', 'key_code': '2', 'character': '@', 'arg': None},
-        "HASH": {'label': '#', 'key_code': '3', 'character': '#', 'arg': None},
-        "DOLLAR": {'label': '$', 'key_code': '4', 'character': '$', 'arg': None},
-        "PERCENT": {'label': '%', 'key_code': '5', 'character': '%', 'arg': None},
-        "AMPERSAND": {'label': '&', 'key_code': '7', 'character': '&', 'arg': None},
-        "STAR": {'label': '*', 'key_code': '*', 'character': '*', 'arg': None},
-        "PLUS": {'label': '+', 'key_code': '=', 'character': '+', 'arg': None},
-        "MINUS": {'label': '-', 'key_code': '-', 'character': '-', 'arg': None},
-        "EQUALS": {'label': '=', 'key_code': '=', 'character': '=', 'arg': None},
-        "FSLASH": {'label': '/', 'key_code': '/', 'character': '/', 'arg': None},
-        "BSLASH": {'label': '\\', 'key_code': '\\', 'character': '\\', 'arg': None},
-        "SINGLEQUOTE": {'label': "'", 'key_code': "'", 'character': "'", 'arg': None},
-        "DOUBLEQUOTE": {'label': '"', 'key_code': '"', 'character': '"', 'arg': None},
-        "OPENBRACKET": {'label': '(', 'key_code': '9', 'character': '(', 'arg': None},
-        "CLOSEBRACKET": {'label': ')', 'key_code': '0', 'character': ')', 'arg': None},
-        "LESSTHAN": {'label': '<', 'key_code': ',', 'character': '<', 'arg': None},
-        "MORETHAN": {'label': '>', 'key_code': '.', 'character': '>', 'arg': None},
-        "CIRCONFLEX": {'label': '^', 'key_code': '6', 'character': '^', 'arg': None},
-        "ENTER": {'label': 'enter', 'key_code': 'enter', 'character': '\n', 'arg': None},
-        "SPACE": {'label': 'space', 'key_code': 'space', 'character': ' ', 'arg': None},
-        "BACKSPACE": {'label': 'bckspc', 'key_code': 'backspace', 'character': '\x08', 'arg': None},
-        "TAB": {'label': 'tab', 'key_code': 'tab', 'character': '\t', 'arg': None},
-        "UNDERSCORE": {'label': 'underscore', 'key_code': '_', 'character': '_', 'arg': None},
-        "PAGEUP": {'label': 'pageup', 'key_code': 'page_up', 'character': None, 'arg': None},
-        "PAGEDOWN": {'label': 'pagedwn', 'key_code': 'page_down', 'character': None, 'arg': None},
-        "LEFTARROW": {'label': 'left', 'key_code': 'left', 'character': None, 'arg': None},
-        "RIGHTARROW": {'label': 'right', 'key_code': 'right', 'character': None, 'arg': None},
-        "UPARROW": {'label': 'up', 'key_code': 'up', 'character': None, 'arg': None},
-        "DOWNARROW": {'label': 'down', 'key_code': 'down', 'character': None, 'arg': None},
-        "ESCAPE": {'label': 'esc', 'key_code': 'esc', 'character': None, 'arg': None},
-        "HOME": {'label': 'home', 'key_code': 'home', 'character': None, 'arg': None},
-        "END": {'label': 'end', 'key_code': 'end', 'character': None, 'arg': None},
-        "DELETE": {'label': 'del', 'key_code': 'delete', 'character': None, 'arg': None},
-        "SHIFT": {'label': 'shift', 'key_code': 'shift', 'character': None, 'arg': None},
-        "RSHIFT": {'label': 'rshift', 'key_code': 'right shift', 'character': None, 'arg': None},
-        "LSHIFT": {'label': 'lshift', 'key_code': 'left shift', 'character': None, 'arg': None},
-        "CTRL": {'label': 'ctrl', 'key_code': 'trl', 'character': None, 'arg': None},
-        "RCTRL": {'label': 'rctrl', 'key_code': 'right ctrl', 'character': None, 'arg': None},
-        "LCTRL": {'label': 'lctrl', 'key_code': 'ctrl', 'character': None, 'arg': None},
-        "ALT": {'label': 'alt', 'key_code': 'alt', 'character': None, 'arg': None},
-        "INSERT": {'label': 'insert', 'key_code': 'insert', 'character': None, 'arg': None},
-        "WINDOWS": {'label': 'win', 'key_code': 'cmd', 'character': None, 'arg': None},
-        "STARTMENU": {'label': 'startmenu', 'key_code': 'start', 'character': None, 'arg': None},
-        "CAPSLOCK": {'label': 'caps', 'key_code': 'caps lock', 'character': None, 'arg': None},
-        "F1": {'label': 'F1', 'key_code': 'f1', 'character': None, 'arg': None},
-        "F2": {'label': 'F2', 'key_code': 'f2', 'character': None, 'arg': None},
-        "F3": {'label': 'F3', 'key_code': 'f3', 'character': None, 'arg': None},
-        "F4": {'label': 'F4', 'key_code': 'f4', 'character': None, 'arg': None},
-        "F5": {'label': 'F5', 'key_code': 'f5', 'character': None, 'arg': None},
-        "F6": {'label': 'F6', 'key_code': 'f6', 'character': None, 'arg': None},
-        "F7": {'label': 'F7', 'key_code': 'f7', 'character': None, 'arg': None},
-        "F8": {'label': 'F8', 'key_code': 'f8', 'character': None, 'arg': None},
-        "F9": {'label': 'F9', 'key_code': 'f9', 'character': None, 'arg': None},
-        "F10": {'label': 'F10', 'key_code': 'f10', 'character': None, 'arg': None},
-        "F11": {'label': 'F11', 'key_code': 'f11', 'character': None, 'arg': None},
-        "F12": {'label': 'F12', 'key_code': 'f12', 'character': None, 'arg': None},
-        "REPEATMODE": {'label': 'repeat', 'key_code': 'REPEATMODE', 'character': None, 'arg': 0},
-        "SOUND": {'label': 'snd', 'key_code': 'unknown', 'character': None, 'arg': 8},
-        "CODESET": {'label': 'code', 'key_code': 'unknown', 'character': None, 'arg': 9},
-        "MOUSERIGHT5": {'label': 'ms right 5', 'key_code': 'MOUSERIGHT5', 'character': None, 'arg': 2},
-        "MOUSEUP5": {'label': 'ms up 5', 'key_code': 'MOUSEUP5', 'character': None, 'arg': 3},
-        "MOUSECLICKLEFT": {'label': 'ms clkleft', 'key_code': 'MOUSECLICKLEFT', 'character': None, 'arg': 4},
-        "MOUSEDBLCLICKLEFT": {'label': 'ms dblclkleft', 'key_code': 'MOUSEDBLCLICKLEFT', 'character': None, 'arg': 5},
-        "MOUSECLKHLDLEFT": {'label': 'ms hldleft', 'key_code': 'MOUSECLKHLDLEFT', 'character': None, 'arg': 6},
-        "MOUSEUPLEFT5": {'label': 'ms leftup 5', 'key_code': 'MOUSEUPLEFT5', 'character': None, 'arg': 7},
-        "MOUSEDOWNLEFT5": {'label': 'ms leftdown 5', 'key_code': 'MOUSEDOWNLEFT5', 'character': None, 'arg': 8},
-        "MOUSERELEASEHOLD": {'label': 'ms release', 'key_code': 'MOUSERELEASEHOLD', 'character': None, 'arg': 9},
-        "MOUSELEFT5": {'label': 'ms left 5', 'key_code': 'MOUSELEFT5', 'character': None, 'arg': 0},
-        "MOUSEDOWN5": {'label': 'ms down 5', 'key_code': 'MOUSEDOWN5', 'character': None, 'arg': 1},
-        "MOUSECLICKRIGHT": {'label': 'ms clkright', 'key_code': 'MOUSECLICKRIGHT', 'character': None, 'arg': 2},
-        "MOUSEDBLCLICKRIGHT": {'label': 'ms dblclkright', 'key_code': 'MOUSEDBLCLICKRIGHT', 'character': None, 'arg': 3},
-        "MOUSECLKHLDRIGHT": {'label': 'ms hldright', 'key_code': 'MOUSECLKHLDRIGHT', 'character': None, 'arg': 4},
-        "MOUSEUPRIGHT5": {'label': 'ms rightup 5', 'key_code': 'MOUSEUPRIGHT5', 'character': None, 'arg': 5},
-        "MOUSEDOWNRIGHT5": {'label': 'ms rightdown 5', 'key_code': 'MOUSEDOWNRIGHT5', 'character': None, 'arg': 6},
-        "MOUSENORMALMODE": {'label': 'normal mode', 'key_code': 'NORMALMODE', 'character': None, 'arg': 7},
-        "MOUSEUP40": {'label': 'ms up 40', 'key_code': 'MOUSEUP40', 'character': None, 'arg': 8},
-        "MOUSEUP250": {'label': 'ms up 250', 'key_code': 'MOUSEUP250', 'character': None, 'arg': 9},
-        "MOUSEDOWN40": {'label': 'ms down 40', 'key_code': 'MOUSEDOWN40', 'character': None, 'arg': 0},
-        "MOUSEDOWN250": {'label': 'ms down 250', 'key_code': 'MOUSEDOWN250', 'character': None, 'arg': 1},
-        "MOUSELEFT40": {'label': 'ms left 40', 'key_code': 'MOUSELEFT40', 'character': None, 'arg': 2},
-        "MOUSELEFT250": {'label': 'ms left 250', 'key_code': 'MOUSELEFT250', 'character': None, 'arg': 3},
-        "MOUSERIGHT40": {'label': 'ms right 40', 'key_code': 'MOUSERIGHT40', 'character': None, 'arg': 4},
-        "MOUSERIGHT250": {'label': 'ms right 250', 'key_code': 'MOUSERIGHT250', 'character': None, 'arg': 5},
-        "MOUSEUPLEFT40": {'label': 'ms leftup 40', 'key_code': 'MOUSEUPLEFT40', 'character': None, 'arg': 6},
-        "MOUSEUPLEFT250": {'label': 'ms leftup 250', 'key_code': 'MOUSEUPLEFT250', 'character': None, 'arg': 7},
-        "MOUSEDOWNLEFT40": {'label': 'ms leftdown 40', 'key_code': 'MOUSEDOWNLEFT40', 'character': None, 'arg': 8},
-        "MOUSEDOWNLEFT250": {'label': 'ms leftdown 250', 'key_code': 'MOUSEDOWNLEFT250', 'character': None, 'arg': 9},
-        "MOUSEUPRIGHT40": {'label': 'ms rightup 40', 'key_code': 'MOUSEUPRIGHT40', 'character': None, 'arg': 0},
-        "MOUSEUPRIGHT250": {'label': 'ms rightup 250', 'key_code': 'MOUSEUPRIGHT250', 'character': None, 'arg': 1},
-        "MOUSEDOWNRIGHT40": {'label': 'ms rightdown 40', 'key_code': 'MOUSEDOWNRIGHT40', 'character': None, 'arg': 2},
-        "MOUSEDOWNRIGHT250": {'label': 'ms rightdown 250', 'key_code': 'MOUSEDOWNRIGHT250', 'character': None, 'arg': 3}
-        }
-        self.config_file = config_file or os.path.join(user_data_dir, 'config.json')
+        self.key_data = _KEY_DATA
+        self.config_file = config_file or os.path.join(_USER_DATA_DIR, 'config.json')
         self.default_config = default_config
-        self.keystrokemap, self.keystrokes = self.initKeystrokeMap()
+        self._pending_config = None
+        self._save_timer = QTimer()
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.flush_config)
+        # Don't lose a save that is still waiting for the timer when the app exits
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush_config)
+        atexit.register(self.flush_config)
+        self.keystrokemap = _KEYSTROKEMAP
+        self.keystrokes = _KEYSTROKES
         self.config = self.read_config()
         self.actions = {}
 
-    def initKeystrokeMap(self):
-        keystrokemap = {}
-        keystrokes = []
-        for key, data in self.key_data.items():
-            stroke = KeyStroke(key.upper(), data['label'], data['key_code'], data['character'])
-            keystrokes.append(stroke)
-            keystrokemap[key.upper()] = stroke
-        return keystrokemap, keystrokes
-
 
     def read_config(self):
         if self.config_file and os.path.exists(self.config_file):
             try:
-                with open(self.config_file, "r") as file:
-                    data = json.load(file)
-                    # self.update_keystrokes(data) # Note:cause issue to save configuration
+                with open(self.config_file, "rb") as file:
+                    data = json_loads(file.read())
+                # self.update_keystrokes(data) # Note:cause issue to save configuration
+                if data.get('schema_version', 1) < CONFIG_SCHEMA_VERSION:
+                    # Older configs stored numbers as strings; convert once and write back
                     self.convert_types(data)
-                    return data
+                    data['schema_version'] = CONFIG_SCHEMA_VERSION
+                    self.save_config(data)
+                return data
             except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
-                logging.warning(f"Error loading configuration: {e}")
-        config = self.default_config.copy()
+                logger.warning("Error loading configuration: %s", e)
+        # Writes land in the front map, lookups fall through to the shared read-only defaults
+        config = ChainMap({}, self.default_config)
         config['fastMorseMode'] = config.get('fastMorseMode', False)  # Default to False if not set
         return config
 
@@ -351,11 +541,21 @@ class ConfigManager:
             data['fontsizescale'] = int(data['fontsizescale'])
 
     def save_config(self, config):
+        self._pending_config = config
+        self._save_timer.start()
+
+    def flush_config(self):
+        """Writes the pending config, replacing the file atomically so a crash can't truncate it."""
+        config, self._pending_config = self._pending_config, None
+        if config is None:
+            return
+        tmp_file = self.config_file + '.tmp'
         try:
-            with open(self.config_file, "w") as file:
-                json.dump(config, file, indent=4)   # self.config
+            with open(tmp_file, "wb") as file:
+                file.write(json_dumps(config))
+            os.replace(tmp_file, self.config_file)
         except Exception as e:
-            logging.warning(f"Error saving configuration: {e}")
+            logger.warning("Error saving configuration: %s", e)
 
     def get_config(self):
         return self.config
@@ -373,101 +573,279 @@ class ConfigManager:
 
             if key.startswith('MOUSE'):
                 # Mouse actions will use ActionLegacy
-                actions[key.upper()] = lambda item, lbl=label, kc=key_code, char=character, a=arg, win=window: ActionLegacy(item, a, lbl, kc)
+                actions[key.upper()] = functools.partial(ActionLegacy, arg=arg, label=label, key=key_code)
             else:
-                # Correctly capture the loop variables using default values in lambda
-                actions[key.upper()] = lambda item, win=window, lbl=label, kc=key_code, char=character, a=arg, tog=toggle_action: ActionKeyStroke(
-                    {'label': lbl, 'key_code': kc, 'character': char, 'arg': a}, kc, tog, win)
+                # Keystroke actions are described by their key table entry rather than the layout item
+                key_item = {'label': label, 'key_code': key_code, 'character': character, 'arg': arg}
+                actions[key.upper()] = functools.partial(make_keystroke_action, key_item, key_code, toggle_action, window)
 
-        # Define special actions with correct lambda capturing
-        actions["CHANGELAYOUT"] = lambda item, win=window: ChangeLayoutAction(item, win.changeLayout)
-        actions["PREDICTION_SELECT"] = lambda item, win=window: PredictionSelectLayoutAction(
-            item, get_predictions_func=win.getTypeStatePredictions)
+        # Special actions only need the window callbacks bound
+        actions["CHANGELAYOUT"] = functools.partial(ChangeLayoutAction, change_layout_callback=window.changeLayout)
+        actions["PREDICTION_SELECT"] = functools.partial(PredictionSelectLayoutAction,
+                                                         get_predictions_func=window.getTypeStatePredictions,
+                                                         window=window)
 
         # Assuming the action name is stored in item['action'] and matches keys in key_data
         actions["KEYSTROKE"] = lambda item, kd=self.key_data, win=window: ActionKeyStroke(
-            item, kd[item['action'].upper()]['key_code'], win=win)
+            item, kd[item['action'].upper()]['key_code'], window=win)
 
-        actions["REPEATMODE"] = lambda item, win=window: RepeatOnAction(item, repeat_on_callback=win.enableRepeatMode)
+        actions["REPEATMODE"] = functools.partial(RepeatOnAction, repeat_on_callback=window.enableRepeatMode)
 
         return actions
 
 
 class TypeState(pressagio.callback.Callback):
+    __slots__ = ('_buf', '_joined', 'revision', 'predictions', 'predictions_revision', '_pred_cache',
+                 'presage', '_presage_ready', '_presage_adopted',
+                 'abbreviations', '_abbrev_depth', '_abbrev_walk', 'expanded_text', 'keyLength')
+
+    # Number of distinct texts whose predictions are kept around
+    PREDICTION_CACHE_SIZE = 512
+
     def __init__ (self, abbreviations=None):
-        self.text = ""
+        # Typed text is kept as appended chunks and joined lazily, see the text property
+        self._buf = []
+        self._joined = ""
+        # Bumped on every change of the text
+        self.revision = 0
         self.predictions = None
+        # Revision the current predictions were computed for
+        self.predictions_revision = -1
+        self._pred_cache = OrderedDict()
 
-        pressagioconfig_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "res",
-                                            "morsewriter_pressagio.ini")
-        logging.debug(f"[TypeState] Searching for pressagio config file with name: {pressagioconfig_file}")
-
-        pressagioconfig = configparser.ConfigParser()
-        pressagioconfig.read(pressagioconfig_file)
+        logger.debug("[TypeState] Using pressagio config file: %s", _PRESSAGIO_INI)
+        pressagioconfig = _PRESSAGIO_CFG
 
         database = pressagioconfig.get("Database", "database")
-        logging.debug(f"[TypeState] Searching for database file: {database}")
-
-        if pressagioconfig:
-            try:
-                self.presage = pressagio.Pressagio(self, pressagioconfig)
-                logging.debug("[TypeState] Pressagio Initialized successfully")
-            except Exception as e:
-                logging.error(f"[TypeState] Pressagio Failed to Initialize with error={e}")
+        logger.debug("[TypeState] Searching for database file: %s", database)
 
         self.abbreviations = abbreviations
+        # Only the last (longest abbreviation + 1) characters can take part in a match
+        self._abbrev_depth = max(map(len, abbreviations), default=0) if abbreviations else 0
+        self._abbrev_walk = functools.lru_cache(maxsize=64)(
+            functools.partial(walk_abbreviation_trie, build_abbreviation_trie(abbreviations)))
         self.expanded_text = None
         self.keyLength = 0
 
+        # Pressagio is built on a worker thread so the GUI can show up meanwhile;
+        # getpredictions returns no predictions until it is ready
+        self.presage = None
+        self._presage_ready = threading.Event()
+        self._presage_adopted = False
+        QThreadPool.globalInstance().start(functools.partial(self._init_presage, pressagioconfig))
+
+    def _init_presage(self, pressagioconfig):
+        try:
+            self.presage = pressagio.Pressagio(self, pressagioconfig)
+            logger.debug("[TypeState] Pressagio Initialized successfully")
+        except Exception as e:
+            logger.error("[TypeState] Pressagio Failed to Initialize with error=%s", e)
+        finally:
+            self._presage_ready.set()
+
+    def _adopt_presage(self):
+        # sqlite connections can only be used on the thread that opened them, so reopen
+        # the ones created by _init_presage on the thread asking for predictions
+        self._presage_adopted = True
+        if self.presage is None:
+            return
+        for predictor in self.presage.predictor_registry:
+            db = getattr(predictor, 'db', None)
+            if isinstance(db, pressagio.dbconnector.SqliteDatabaseConnector):
+                db.open_database()
+
+    @property
+    def text(self):
+        if self._joined is None:
+            self._joined = ''.join(self._buf)
+            # Keep the buffer collapsed so the next join only covers new chunks
+            self._buf = [self._joined] if self._joined else []
+        return self._joined
+
+    @text.setter
+    def text(self, value):
+        self._buf = [value] if value else []
+        self._joined = value
+        self.revision += 1
+
+    def tail(self, n):
+        """Returns the last n characters of the text, only joining the chunks they are in."""
+        if n <= 0:
+            return ''
+        if self._joined is not None:
+            return self._joined[-n:]
+        parts = []
+        size = 0
+        for chunk in reversed(self._buf):
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= n:
+                break
+        return ''.join(reversed(parts))[-n:]
+
     def past_stream (self):
         return self.text
     def future_stream (self):
         return self.text
     def pushchar (self, char):
-        self.text += char
-        self.predictions = None
-        logging.debug(f"Updated TypeState text: {self.text}")
+        if not char:
+            return
+        self._buf.append(char)
+        self._joined = None
+        self.revision += 1
+        logger.debug("Updated TypeState text: pushed %r, %d chunks", char, len(self._buf))
     def pushstr (self, str):
-        self.text += str
-        self.predictions = None
-        logging.debug(f"Updated TypeState text: {self.text}")
+        if not str:
+            return
+        self._buf.append(str)
+        self._joined = None
+        self.revision += 1
+        logger.debug("Updated TypeState text: pushed %r, %d chunks", str, len(self._buf))
     def popchar (self):
-        self.text = self.text[:-1]
-        self.predictions = None
+        if self._buf:
+            last = self._buf.pop()
+            if len(last) > 1:
+                self._buf.append(last[:-1])
+            self._joined = None
+            self.revision += 1
     def getpredictions(self):
-        logging.debug("[TypeState] Fetching predictions for text: {}".format(self.text))
-        if self.predictions is None:
-            try:
-                self.predictions = self.presage.predict()
-                logging.debug("[TypeState] Predictions fetched: {}".format(self.predictions))
-
-            except Exception as e:
-                logging.error(f"[TypeState] Failed to generate predictions: {str(e)}")
-                self.predictions = []
+        text = self.text
+        logger.debug("[TypeState] Fetching predictions for text: %s", text)
+        cached = self._pred_cache.get(text)
+        if cached is not None:
+            # Typing back to a previously seen prefix (e.g. after a backspace) is a cache hit
+            self._pred_cache.move_to_end(text)
+            self.predictions = cached
+            self.predictions_revision = self.revision
+            return cached
+
+        if not self._presage_ready.is_set():
+            return []
+        if not self._presage_adopted:
+            self._adopt_presage()
 
+        try:
+            self.predictions = self.presage.predict()
+            logger.debug("[TypeState] Predictions fetched: %s", self.predictions)
+        except Exception as e:
+            logger.error("[TypeState] Failed to generate predictions: %s", e)
+            self.predictions = []
+            return self.predictions
+
+        self.predictions_revision = self.revision
+        self._pred_cache[text] = self.predictions
+        if len(self._pred_cache) > self.PREDICTION_CACHE_SIZE:
+            self._pred_cache.popitem(last=False)
         return self.predictions
 
 
     def get_abbreviation(self):
-        logging.debug("[TypeState] Fetching abbreviation for text: {}".format(self.text))
-        if self.text is not None:
-            try:
-                self.expanded_text, self.keyLength = expand_abbreviation(self.text, self.abbreviations)
-                logging.debug("[TypeState] Abbreviation fetched: {}".format(self.expanded_text))
+        try:
+            # Only the last (longest abbreviation + 1) characters before any trailing whitespace
+            # can match, so read just enough of the tail instead of the whole text
+            want = self._abbrev_depth + 1
+            n = want
+            while True:
+                text = self.tail(n)
+                end = len(text)
+                while end and text[end - 1].isspace():
+                    end -= 1
+                if end >= want or len(text) < n:
+                    break  # Enough characters, or the whole text is in hand
+                n *= 2
+            logger.debug("[TypeState] Fetching abbreviation for text ending: %s", text)
+            self.expanded_text, self.keyLength = self._abbrev_walk(text[max(end - want, 0):end])
+            logger.debug("[TypeState] Abbreviation fetched: %s", self.expanded_text)
 
-            except Exception as e:
-                logging.error(f"[TypeState] Failed to get abbreviations: {str(e)}")
-                self.expanded_text = None, None
+        except Exception as e:
+            logger.error("[TypeState] Failed to get abbreviations: %s", e)
+            self.expanded_text = None, None
 
         return self.expanded_text, self.keyLength
 
+# Native low-level keyboard hook used by KeyListenerThread on Windows, so key events
+# reach us straight from the OS hook instead of through the keyboard library's dispatcher
+if platform.system() == 'Windows':
+    import ctypes
+    from ctypes import wintypes
+
+    _user32 = ctypes.WinDLL('user32', use_last_error=True)
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+    _WH_KEYBOARD_LL = 13
+    _WM_QUIT = 0x0012
+    _WM_USER = 0x0400
+    _PM_NOREMOVE = 0x0000
+    _WM_KEYDOWN, _WM_KEYUP, _WM_SYSKEYDOWN, _WM_SYSKEYUP = 0x0100, 0x0101, 0x0104, 0x0105
+    _LLKHF_INJECTED = 0x10
+
+    _LRESULT = ctypes.c_ssize_t
+    _HOOKPROC = ctypes.WINFUNCTYPE(_LRESULT, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+
+    class _KBDLLHOOKSTRUCT(ctypes.Structure):
+        _fields_ = [('vkCode', wintypes.DWORD), ('scanCode', wintypes.DWORD), ('flags', wintypes.DWORD),
+                    ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+    _user32.SetWindowsHookExW.argtypes = (ctypes.c_int, _HOOKPROC, wintypes.HINSTANCE, wintypes.DWORD)
+    _user32.SetWindowsHookExW.restype = wintypes.HHOOK
+    _user32.CallNextHookEx.argtypes = (wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+    _user32.CallNextHookEx.restype = _LRESULT
+    _user32.UnhookWindowsHookEx.argtypes = (wintypes.HHOOK,)
+    _user32.GetMessageW.argtypes = (ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT)
+    _user32.PeekMessageW.argtypes = (ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT,
+                                     wintypes.UINT)
+    _user32.PostThreadMessageW.argtypes = (wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+    _user32.GetKeyState.argtypes = (ctypes.c_int,)
+    _user32.GetKeyState.restype = wintypes.SHORT
+    _kernel32.GetModuleHandleW.argtypes = (wintypes.LPCWSTR,)
+    _kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+    # Virtual-key codes for the 'keyboard' library key names a Morse key can be configured with.
+    # Generic modifier names match both the left and right key, as they do in 'keyboard'.
+    _WIN_VK_CODES = {
+        'space': (0x20,), 'enter': (0x0D,), 'tab': (0x09,), 'backspace': (0x08,), 'esc': (0x1B,),
+        'shift': (0xA0, 0xA1), 'left shift': (0xA0,), 'right shift': (0xA1,),
+        'ctrl': (0xA2, 0xA3), 'left ctrl': (0xA2,), 'right ctrl': (0xA3,),
+        'alt': (0xA4, 0xA5), 'left alt': (0xA4,), 'right alt': (0xA5,),
+    }
+    _WIN_VK_CODES.update({str(n): (0x30 + n,) for n in range(10)})
+    _WIN_VK_CODES.update({chr(c): (c - 0x20,) for c in range(ord('a'), ord('z') + 1)})
+    _WIN_VK_CODES.update({'f%d' % n: (0x6F + n,) for n in range(1, 13)})
+
+    _VK_CAPITAL = 0x14
+    _WIN_VK_MODIFIERS = {0xA0: 'shift', 0xA1: 'shift', 0xA2: 'ctrl', 0xA3: 'ctrl', 0xA4: 'alt', 0xA5: 'alt',
+                         _VK_CAPITAL: 'caps lock'}
+
+
 class KeyListenerThread(QThread):
-    keyEvent = pyqtSignal(str, bool, int)  # Emit key name and press/release status
+    # Emitted when key events are waiting in the ring; the receiver collects them with drain_events()
+    keyEventsReady = pyqtSignal()
+    # Emitted with (modifier key name, state) only when a modifier's state actually changes;
+    # the state of 'caps lock' is whether it is locked
+    modifierChanged = pyqtSignal(str, bool)
+
+    # Undelivered events kept at most; only reached if the GUI thread stalls, then the oldest go
+    RING_SIZE = 1024
 
     def __init__(self, configured_keys):
         super().__init__()
         self.configured_keys = configured_keys  # keys in the 'keyboard' library format
-        self.keep_running = True  # Control running of the loop
+        # (key name, pressed, role, perf_counter_ns() of the event), written by the hook, read by the GUI thread
+        self._ring = deque(maxlen=self.RING_SIZE)
+        self._ring_lock = threading.Lock()
+        self._drain_scheduled = False  # keyEventsReady sent and drain_events() not yet called
+        # Role of each key is its position in configured_keys (first occurrence wins, as with list.index)
+        self._key_role = {}
+        for role, key in enumerate(configured_keys):
+            self._key_role.setdefault(key, role)
+        self._mod_state = dict.fromkeys(MODIFIER_KEYS, False)
+        # Copy of _mod_state for other threads, replaced as a whole on every change so readers
+        # always see a consistent snapshot without locking or calling into 'keyboard'
+        self.shared_key_state = MappingProxyType(dict(self._mod_state))
+        self._caps_down = False  # Caps lock physically held, so its auto-repeat doesn't flip the lock again
+        self._stop_event = threading.Event()  # Set by stop() to let run() return
+        self._hook_thread_id = None  # Thread running the native Windows hook, if any
+        self._morse_scan_codes = frozenset()  # Scan codes of configured_keys, set up by run()
 
     def run(self):
         # Check if the operating system is MacOS
@@ -476,54 +854,171 @@ class KeyListenerThread(QThread):
             allowed_keys = ['shift', 'ctrl', 'alt', 'cmd']
             self.configured_keys = [key for key in self.configured_keys if key in allowed_keys]
 
+        if platform.system() == 'Windows' and self.run_native_hook():
+            return
+
         # Setup key hooks once, outside the loop
         for key in self.configured_keys:
             keyboard.on_press_key(key, self.on_press, suppress=True)
             keyboard.on_release_key(key, self.on_release, suppress=True)
+        # A side-specific morse key ('right shift') is also reported under the generic modifier name,
+        # so modifier events are matched against the morse keys' scan codes too
+        scan_codes = set()
+        for key in self.configured_keys:
+            try:
+                scan_codes.update(keyboard.key_to_scan_codes(key))
+            except ValueError:
+                pass
+        self._morse_scan_codes = frozenset(scan_codes)
+        for key in MODIFIER_KEYS:
+            if key not in self._key_role:
+                keyboard.on_press_key(key, functools.partial(self.on_modifier, key, True))
+                keyboard.on_release_key(key, functools.partial(self.on_modifier, key, False))
+
+        # Keep the thread alive without waking up until stop() is called
+        self._stop_event.wait()
+
+    def push_event(self, key, pressed, role):
+        # The first event announces itself at once; events arriving before the GUI thread drains
+        # are picked up by that same drain rather than queueing further wakeups
+        with self._ring_lock:
+            self._ring.append((key, pressed, role, time.perf_counter_ns()))
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        self.keyEventsReady.emit()
+
+    def drain_events(self):
+        """Returns the queued key events, oldest first. Called on the GUI thread for keyEventsReady."""
+        with self._ring_lock:
+            events = list(self._ring)
+            self._ring.clear()
+            self._drain_scheduled = False
+        return events
+
+    def on_modifier(self, key, pressed, event=None):
+        if event is not None and (event.name in self._key_role or event.scan_code in self._morse_scan_codes):
+            return  # A morse key, swallowed rather than held
+        if key == 'caps lock':
+            was_down, self._caps_down = self._caps_down, pressed
+            if not pressed or was_down:
+                return  # Only going from up to down flips the lock
+            pressed = not self._mod_state[key]
+        self.set_modifier(key, pressed)
+
+    def set_modifier(self, key, state):
+        if self._mod_state[key] == state:
+            return  # Unchanged, e.g. the OS repeating a held press
+        self._mod_state[key] = state
+        self.shared_key_state = MappingProxyType(dict(self._mod_state))
+        self.modifierChanged.emit(key, state)
+
+    def run_native_hook(self):
+        """
+        Listens through a WH_KEYBOARD_LL hook until stop() is called. Returns False without
+        installing anything if a configured key has no known virtual-key code.
+        """
+        vk_keys = {}
+        for key in self.configured_keys:
+            vk_codes = _WIN_VK_CODES.get(key)
+            if vk_codes is None:
+                logger.info("[KeyListenerThread] No virtual-key code for '%s', using keyboard hooks", key)
+                return False
+            for vk in vk_codes:
+                vk_keys.setdefault(vk, key)
+
+        def hook_proc(n_code, w_param, l_param):
+            if n_code == 0:
+                event = ctypes.cast(l_param, ctypes.POINTER(_KBDLLHOOKSTRUCT)).contents
+                key = vk_keys.get(event.vkCode)
+                modifier = _WIN_VK_MODIFIERS.get(event.vkCode)
+                if modifier is not None and key is None:
+                    self.on_modifier(modifier, w_param in (_WM_KEYDOWN, _WM_SYSKEYDOWN))
+                # Let through keys we inject ourselves when typing, only swallow the user's presses
+                if key is not None and not event.flags & _LLKHF_INJECTED:
+                    if w_param in (_WM_KEYDOWN, _WM_SYSKEYDOWN):
+                        self.push_event(key, True, self._key_role[key])
+                        return 1
+                    if w_param in (_WM_KEYUP, _WM_SYSKEYUP):
+                        self.push_event(key, False, self._key_role[key])
+                        return 1
+            return _user32.CallNextHookEx(None, n_code, w_param, l_param)
+
+        callback = _HOOKPROC(hook_proc)  # Must stay referenced while the hook is installed
+        msg = wintypes.MSG()
+        # Make sure this thread has a message queue before stop() can post WM_QUIT to it
+        _user32.PeekMessageW(ctypes.byref(msg), None, _WM_USER, _WM_USER, _PM_NOREMOVE)
+        self._hook_thread_id = _kernel32.GetCurrentThreadId()
+        if self._stop_event.is_set():
+            return True
 
-        # Minimal loop to keep the thread alive
-        while self.keep_running:
-            time.sleep(0.1)  # Small sleep to avoid CPU overload
+        hook = _user32.SetWindowsHookExW(_WH_KEYBOARD_LL, callback, _kernel32.GetModuleHandleW(None), 0)
+        if not hook:
+            logger.error("[KeyListenerThread] SetWindowsHookExW failed: %s", ctypes.get_last_error())
+            self._hook_thread_id = None
+            return False
+        # Start from the real lock state, the 'keyboard' hooks have no way to read it and start unlocked
+        if 'caps lock' not in self._key_role:
+            self.set_modifier('caps lock', bool(_user32.GetKeyState(_VK_CAPITAL) & 1))
+        try:
+            while _user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                pass
+        finally:
+            _user32.UnhookWindowsHookEx(hook)
+        return True
 
     def on_press(self, event):
-        logging.debug(f"[KeyListenerThread] on_press: {event.name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[KeyListenerThread] on_press: %s", event.name)
+        role = self._key_role.get(event.name)
+        if role is None:
+            logger.warning("[KeyListenerThread] on_press: '%s' is not a configured key", event.name)
+            return
         try:
-            role = self.configured_keys.index(event.name)
-            self.keyEvent.emit(event.name, True, role)
+            self.push_event(event.name, True, role)
         except Exception as e:
-            logging.warning(f"[KeyListenerThread] Error handling on_press key event: {e}")
+            logger.warning("[KeyListenerThread] Error handling on_press key event: %s", e)
 
     def on_release(self, event):
-        logging.debug(f"[KeyListenerThread] on_release: {event.name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[KeyListenerThread] on_release: %s", event.name)
+        role = self._key_role.get(event.name)
+        if role is None:
+            logger.warning("[KeyListenerThread] on_release: '%s' is not a configured key", event.name)
+            return
         try:
-            role = self.configured_keys.index(event.name)
-            self.keyEvent.emit(event.name, False, role)
+            self.push_event(event.name, False, role)
         except Exception as e:
-            logging.warning(f"[KeyListenerThread] Error handling on_release key event: {e}")
+            logger.warning("[KeyListenerThread] Error handling on_release key event: %s", e)
 
     def stop(self):
-        self.keep_running = False  # Signal the loop to stop
+        self._stop_event.set()  # Release the wait in run()
+        if self._hook_thread_id is not None:
+            _user32.PostThreadMessageW(self._hook_thread_id, _WM_QUIT, 0, 0)  # End the native hook loop
         keyboard.unhook_all()  # Unhook all keys
         self.quit()  # Quit the thread's event loop if necessary
         self.wait()  # Wait for the thread to finish
 
 
 class KeyCombinationListener(QObject):
+    # Ctrl + Shift + P leaves Morse mode
+    _ESCAPE_MODS = int(Qt.ControlModifier | Qt.ShiftModifier)
+    _ESCAPE_KEY = int(Qt.Key_P)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_modifiers = 0
         self.current_key = 0
-        logging.debug(f"[KeyCombinationListener __init__]")
+        logger.debug("[KeyCombinationListener __init__]")
 
     def keyPressEvent(self, event):
         self.current_modifiers |= int(event.modifiers())
         self.current_key = event.key()
 
-        if (self.current_modifiers & Qt.CTRL and
-            self.current_modifiers & Qt.SHIFT and
-            self.current_key == Qt.Key_P):
+        if ((self.current_modifiers & self._ESCAPE_MODS) == self._ESCAPE_MODS and
+                self.current_key == self._ESCAPE_KEY):
             self.resetState()
-            logging.debug("[KeyCombinationListener] \"Ctrl + Shift + P\" detected Escaping Morse Mode")
+            logger.debug("[KeyCombinationListener] \"Ctrl + Shift + P\" detected Escaping Morse Mode")
             return True
         else:
             self.resetState()
@@ -553,24 +1048,31 @@ class LayoutManager:
         self.layout_file = layout_file
         self.layouts = {}
         self.active_layout_name = None
+        self.active_layout = None
         self.main_layout_name = None
+        self._active_perform_map = {}
         self.load_layouts()
 
     def load_layouts(self):
         """Loads layout data from a JSON file without assigning actions."""
         try:
-            with open(self.layout_file, "r") as f:
-                data = json.load(f)
+            data = self.parse_layout_file(self.layout_file)
             self.layouts = {k: v for k, v in data['layouts'].items()}
             self.main_layout_name = data.get('mainlayout')
             self.active_layout_name = data.get('mainlayout')
             if self.active_layout_name not in self.layouts:
                 raise ValueError("No valid main layout found in the layout file.")
+            self.index_active_layout()
         except FileNotFoundError:
             raise Exception(f"Layout file {self.layout_file} not found.")
         except json.JSONDecodeError:
             raise Exception("Error decoding JSON from the layout file.")
 
+    @staticmethod
+    def parse_layout_file(layout_file):
+        with open(layout_file, "rb") as f:
+            return json_loads(f.read())
+
     def set_actions(self, actions):
         """Integrates actions with the layout items loaded from the layout file."""
         for layout_name, layout in self.layouts.items():
@@ -581,31 +1083,67 @@ class LayoutManager:
                         item['_action'] = actions[action_name](item)
                     else:
                         item['_action'] = None
-                        logging.warning(f"No action found for {action_name} in layout {layout_name}")
+                        logger.warning("No action found for %s in layout %s", action_name, layout_name)
+        self.index_active_layout()
 
     def set_active(self, layout_name):
         """Sets the active layout by name."""
         if layout_name in self.layouts:
             self.active_layout_name = layout_name
-            logging.info(f"Active layout set to {layout_name}")
+            self.index_active_layout()
+            logger.info("Active layout set to %s", layout_name)
         else:
             raise ValueError("Specified layout does not exist.")
 
+    def index_active_layout(self):
+        """Rebuilds the lookup structures for the active layout."""
+        self.active_layout = self.layouts[self.active_layout_name]
+        # Empty spaces carry placeholder codes such as "None_1", leave those out
+        items = [item for item in self.active_layout.get('items', [])
+                 if item.get('code') and not item['code'].strip('12')]
+        # Bound perform methods, flagged when they take the batch's MouseMoveFrame (ActionLegacy)
+        self._active_perform_map = {encode(item['code']): (item['_action'].perform,
+                                                           isinstance(item['_action'], ActionLegacy))
+                                    for item in items
+                                    if callable(getattr(item.get('_action'), 'perform', None))}
+
+    def get_perform(self, code):
+        """Returns (perform, takes_frame) for an encode()d morse code in the active layout, or None."""
+        return self._active_perform_map.get(code)
+
     def get_active_layout(self):
         """Returns the currently active layout."""
-        if self.active_layout_name:
-            return self.layouts[self.active_layout_name]
+        if self.active_layout is not None:
+            return self.active_layout
         else:
             raise ValueError("No active layout set.")
 
 def moveMouse(x_delta, y_delta):
-    logging.info(f"moveMouse to {x_delta} {y_delta}")
+    logger.info("moveMouse to %s %s", x_delta, y_delta)
     # current_pos = mouse.get_position()
     # new_pos = (current_pos[0] + x_delta, current_pos[1] + y_delta)
     mouse.move(x_delta, y_delta, False)
 
+
+class MouseMoveFrame:
+    """Sums the mouse moves made while handling one batch of key events, see ActionLegacy.perform."""
+    __slots__ = ('dx', 'dy')
+
+    def __init__(self):
+        self.dx = 0
+        self.dy = 0
+
+    def add(self, x_delta, y_delta):
+        self.dx += x_delta
+        self.dy += y_delta
+
+    def flush(self):
+        if self.dx or self.dy:
+            moveMouse(self.dx, self.dy)
+            self.dx = self.dy = 0
+
 def clickMouse(button='left', action='click'):
-    logging.info(f"clickMouse to {button} {action}")
+    logger.info("clickMouse to %s %s", button, action)
     btn = mouse.LEFT if button == 'left' else mouse.RIGHT
     if action == 'click':
         mouse.click(btn)
@@ -615,18 +1153,21 @@ def clickMouse(button='left', action='click'):
         mouse.release(btn)
 
 
-def getPossibleCombos(currentCharacter):
-    x = ""
-    for i in currentCharacter:
-        x += str(i)
-    possibleactions = []
-    for action in normalmapping:
-        if (len(action) >= len(x) and action[:len(x)] == x):
-            possibleactions.append(action)
-    logging.debug("possible: %s", str(possibleactions))
+# Dit in every spelling a morse sequence comes in: ints, '1'/'.' strings and their ASCII bytes
+_DIT_SYMBOLS = frozenset((1, '1', '.', 0x31, 0x2E))
+
+
+def encode(seq):
+    """Packs a morse sequence into an int: its length, then 2 bits per symbol (01 dit, 10 dah)."""
+    v = len(seq)
+    for s in seq:
+        v = (v << 2) | (1 if s in _DIT_SYMBOLS else 2)
+    return v
 
 
 class Action (object):
+    __slots__ = ('item',)
+
     def __init__(self, item):
         self.item = item
     def getlabel (self):
@@ -637,6 +1178,40 @@ class Action (object):
 
 
 class ActionLegacy (Action):
+    __slots__ = ('arg', 'label', 'key')
+
+    _ACTION_MAP = {
+        'MOUSEUP5': (moveMouse, (0, -5)),
+        'MOUSEDOWN5': (moveMouse, (0, 5)),
+        'MOUSELEFT5': (moveMouse, (-5, 0)),
+        'MOUSERIGHT5': (moveMouse, (5, 0)),
+        'MOUSEUPLEFT5': (moveMouse, (-5, -5)),
+        'MOUSEUPRIGHT5': (moveMouse, (5, -5)),
+        'MOUSEDOWNLEFT5': (moveMouse, (-5, 5)),
+        'MOUSEDOWNRIGHT5': (moveMouse, (5, 5)),
+        'MOUSEUP40': (moveMouse, (0, -40)),
+        'MOUSEDOWN40': (moveMouse, (0, 40)),
+        'MOUSELEFT40': (moveMouse, (-40, 0)),
+        'MOUSERIGHT40': (moveMouse, (40, 0)),
+        'MOUSEUPLEFT40': (moveMouse, (-40, -40)),
+        'MOUSEUPRIGHT40': (moveMouse, (40, -40)),
+        'MOUSEDOWNLEFT40': (moveMouse, (-40, 40)),
+        'MOUSEDOWNRIGHT40': (moveMouse, (40, 40)),
+        'MOUSEUP250': (moveMouse, (0, -250)),
+        'MOUSEDOWN250': (moveMouse, (0, 250)),
+        'MOUSELEFT250': (moveMouse, (-250, 0)),
+        'MOUSERIGHT250': (moveMouse, (250, 0)),
+        'MOUSEUPLEFT250': (moveMouse, (-250, -250)),
+        'MOUSEUPRIGHT250': (moveMouse, (250, -250)),
+        'MOUSEDOWNLEFT250': (moveMouse, (-250, 250)),
+        'MOUSEDOWNRIGHT250': (moveMouse, (250, 250)),
+        'MOUSECLICKLEFT': (clickMouse, (mouse.LEFT, 'click')),
+        'MOUSECLICKRIGHT': (clickMouse, (mouse.RIGHT, 'click')),
+        'MOUSECLKHLDLEFT': (clickMouse, (mouse.LEFT, 'press')),
+        'MOUSECLKHLDRIGHT': (clickMouse, (mouse.RIGHT, 'press')),
+        'MOUSERELEASEHOLD': (clickMouse, (mouse.LEFT, 'release')),  # Assumes left button for example
+    }
+
     def __init__(self, item, arg, label, key=None):
         super(ActionLegacy, self).__init__(item)  # Pass required parameters
         # Additional initialization for ActionLegacy
@@ -648,56 +1223,26 @@ class ActionLegacy (Action):
         return self.label
 
 
-    def perform(self):
-        logging.debug(f"[ActionLegacy] Key to press/release: {self.key}, type: {type(self.key)}")
-        action_map = {
-            'MOUSEUP5': lambda: moveMouse(0, -5),
-            'MOUSEDOWN5': lambda: moveMouse(0, 5),
-            'MOUSELEFT5': lambda: moveMouse(-5, 0),
-            'MOUSERIGHT5': lambda: moveMouse(5, 0),
-            'MOUSEUPLEFT5': lambda: moveMouse(-5, -5),
-            'MOUSEUPRIGHT5': lambda: moveMouse(5, -5),
-            'MOUSEDOWNLEFT5': lambda: moveMouse(-5, 5),
-            'MOUSEDOWNRIGHT5': lambda: moveMouse(5, 5),
-            'MOUSEUP40': lambda: moveMouse(0, -40),
-            'MOUSEDOWN40': lambda: moveMouse(0, 40),
-            'MOUSELEFT40': lambda: moveMouse(-40, 0),
-            'MOUSERIGHT40': lambda: moveMouse(40, 0),
-            'MOUSEUPLEFT40': lambda: moveMouse(-40, -40),
-            'MOUSEUPRIGHT40': lambda: moveMouse(40, -40),
-            'MOUSEDOWNLEFT40': lambda: moveMouse(-40, 40),
-            'MOUSEDOWNRIGHT40': lambda: moveMouse(40, 40),
-            'MOUSEUP250': lambda: moveMouse(0, -250),
-            'MOUSEDOWN250': lambda: moveMouse(0, 250),
-            'MOUSELEFT250': lambda: moveMouse(-250, 0),
-            'MOUSERIGHT250': lambda: moveMouse(250, 0),
-            'MOUSEUPLEFT250': lambda: moveMouse(-250, -250),
-            'MOUSEUPRIGHT250': lambda: moveMouse(250, -250),
-            'MOUSEDOWNLEFT250': lambda: moveMouse(-250, 250),
-            'MOUSEDOWNRIGHT250': lambda: moveMouse(250, 250),
-            'MOUSECLICKLEFT': lambda: clickMouse(mouse.LEFT, 'click'),
-            'MOUSECLICKRIGHT': lambda: clickMouse(mouse.RIGHT, 'click'),
-            'MOUSECLKHLDLEFT': lambda: clickMouse(mouse.LEFT, 'press'),
-            'MOUSECLKHLDRIGHT': lambda: clickMouse(mouse.RIGHT, 'press'),
-            'MOUSERELEASEHOLD': lambda: clickMouse(mouse.LEFT, 'release')  # Assumes left button for example
-        }
-
-        # Execute the mapped function based on self.key if exists
-        if self.key and self.key in action_map:
-            action_map[self.key]()
+    def perform(self, flush_ctx=None):
+        logger.debug("[ActionLegacy] Key to press/release: %s, type: %s", self.key, type(self.key))
+        entry = ActionLegacy._ACTION_MAP.get(self.key)
+        if entry:
+            if flush_ctx is not None:
+                # Moves are summed up and made once at the end of the frame; anything
+                # else has to see the cursor where the earlier moves put it
+                if entry[0] is moveMouse:
+                    flush_ctx.add(*entry[1])
+                    return
+                flush_ctx.flush()
+            entry[0](*entry[1])
         else:
-            logging.debug(f"[ActionLegacy-perform] No action defined for key: {self.key}")
-
+            logger.debug("[ActionLegacy-perform] No action defined for key: %s", self.key)
 
-class KeyStroke:
-    def __init__(self, name, label, key_code, character):
-        self.name = name
-        self.label = label
-        self.key_code = key_code
-        self.character = character
 
 
 class ActionKeyStroke(Action):
+    __slots__ = ('key', 'label', 'toggle_action', 'window')
+
     def __init__(self, item, key, toggle_action=False, window=None):
         super(ActionKeyStroke, self).__init__(item)
         self.key = key
@@ -721,42 +1266,50 @@ class ActionKeyStroke(Action):
         return self.label
 
     def perform(self):
-        logging.debug(f"[ActionKeyStroke] Key to press/release: {self.key}, type: {type(self.key)}")
+        logger.debug("[ActionKeyStroke] Key to press/release: %s, type: %s", self.key, type(self.key))
         try:
             if self.toggle_action:
-                current_state = get_keystroke_state(self.key)  # Ensure this function is properly defined.
-                if current_state['down']:
+                down = self.window.sharedKeyState.get(self.key)
+                if down is None:
+                    down = keyboard.is_pressed(self.key)  # Not a tracked modifier
+                if down:
                     keyboard.release(self.key)
                 else:
                     keyboard.press(self.key)
             else:
-                    logging.debug(f"[ActionKeyStroke] pressing {self.key}, past Stream {self.window.typestate.past_stream()}")
+                    logger.debug("[ActionKeyStroke] pressing %s", self.key)
 
                     keyboard.press_and_release(self.key)
                     # Update typestate based on key action.
                     if self.window.typestate is not None:
                         key_char = self.item.get('character')  # Assuming 'character' is stored in 'item'
                         if self.key in ['backspace', 'delete']:
-                            logging.debug(f"[ActionKeyStroke] popchar")
+                            logger.debug("[ActionKeyStroke] popchar")
                             self.window.typestate.popchar()
                         else:
-                            logging.debug(f"[ActionKeyStroke] pushchar")
+                            logger.debug("[ActionKeyStroke] pushchar")
                             self.window.typestate.pushchar(key_char)
 
                         abbreviation, keylength = self.window.typestate.get_abbreviation()
                         if abbreviation is not None:
                             for _ in range(keylength):
                                 self.window.typestate.popchar()
-                                keyboard.press_and_release('backspace')
-
-                            for itm in abbreviation:
-                                keyboard.press_and_release(itm)
-                            keyboard.press_and_release('space')
+                            if keylength:
+                                # One multi-step hotkey instead of a round trip per backspace
+                                keyboard.send(', '.join(('backspace',) * keylength))
+                            keyboard.write(abbreviation + ' ')
         except Exception as e:
-            logging.error(f"[ActionKeyStroke] Error during key press/release: {e}")
+            logger.error("[ActionKeyStroke] Error during key press/release: %s", e)
+
+
+def make_keystroke_action(key_item, key_code, toggle_action, window, item):
+    # The layout item is ignored, the action is built from the key table entry
+    return ActionKeyStroke(key_item, key_code, toggle_action, window)
 
 
 class ChangeLayoutAction(Action):
+    __slots__ = ('change_layout_callback', 'layout_name')
+
     def __init__(self, item, change_layout_callback):
         super().__init__(item)
         self.change_layout_callback = change_layout_callback
@@ -784,37 +1337,61 @@ class ChangeLayoutAction(Action):
 
 
 class PredictionSelectLayoutAction(Action):
-    def __init__(self, item, get_predictions_func):
+    __slots__ = ('get_predictions_func', 'window')
+
+    # (typestate, revision) -> predictions, shared by all prediction slots so a repaint predicts once
+    _cache = {}
+
+    def __init__(self, item, get_predictions_func, window=None):
         super(PredictionSelectLayoutAction, self).__init__(item)
         self.get_predictions_func = get_predictions_func
+        self.window = window
 
     def getlabel(self):
-        predictions = self.get_predictions_func()
+        typestate = self.window.typestate if self.window is not None else None
+        key = (typestate, typestate.revision if typestate is not None else None)
+        predictions = PredictionSelectLayoutAction._cache.get(key)
+        if predictions is None:
+            predictions = tuple(self.get_predictions_func())
+            # Only predictions computed for the current revision are cached; a not-ready result
+            # (presage still loading) is not, so the next repaint asks again
+            if typestate is not None and typestate.predictions_revision == key[1]:
+                PredictionSelectLayoutAction._cache = {key: predictions}
         target = self.item.get('target', -1)
         if 0 <= target < len(predictions):
             return predictions[target]
         return ""
 
     def perform(self):
-        logging.debug(f"[PredictionSelectLayoutAction] perform")
+        logger.debug("[PredictionSelectLayoutAction] perform")
+        typestate = self.window.typestate if self.window is not None else None
         if typestate is not None:
             target = self.item['target']
             predictions = typestate.getpredictions()
             if target >= 0 and target < len(predictions):
                 pred = predictions[target]
-                stripsuffix = ""
-                for i in range(len(pred)):
-                    idx = len(typestate.text) - i
-                    if idx == 0 or (idx > 0 and typestate.text[idx - 1] in [" ", "\n", "\t", "\r"]):
-                        stripsuffix = typestate.text[idx:]
-                        break
+                text = typestate.text
+                # The word being completed starts after the last whitespace, looking back
+                # no further than the length of the prediction
+                start = max(len(text) - len(pred), 0)
+                space = max(text.rfind(c, start) for c in " \n\t\r")
+                if space >= 0:
+                    stripsuffix = text[space + 1:]
+                elif len(text) < len(pred):
+                    stripsuffix = text
+                else:
+                    stripsuffix = ""
                 newchars = pred[len(stripsuffix):] + " "
-                typestate.text = typestate.text[:len(typestate.text)-len(stripsuffix)] + newchars
-                for char in newchars:
-                    keyboard.press_and_release(char)  # This handles normal characters
+                typestate.text = text[:len(text)-len(stripsuffix)] + newchars
+                try:
+                    keyboard.write(newchars)
+                except Exception as e:
+                    logger.error("[PredictionSelectLayoutAction] Error typing prediction: %s", e)
 
 
 class RepeatOnAction(Action):
+    __slots__ = ('repeat_on_callback',)
+
     def __init__(self, item, repeat_on_callback):
         super(RepeatOnAction, self).__init__(item)
         self.repeat_on_callback = repeat_on_callback
@@ -826,60 +1403,117 @@ class RepeatOnAction(Action):
             raise ValueError("Repeat On callback is not callable")
 
 class Window(QDialog):
+    # Radio button attribute for each number of input keys
+    KEYLEN_RADIOS = (('keySelectionRadioOneKey', 1), ('keySelectionRadioTwoKey', 2), ('keySelectionRadioThreeKey', 3))
+
     def __init__(self, layoutManager=None, configManager=None):
         super(Window, self).__init__()
         self.layoutManager = layoutManager
         self.configManager = configManager
         self.config = self.configManager.get_config()
+        self._reload_config_cache()
         self.typestate = None
         self.actions = {}
         self.keystrokes = []
         self.keystrokemap = {}
-        logging.info(f"Window initialized with layout: {self.layoutManager.main_layout_name}")
+        self._keystrokemap_upper = {}
+        self._filtered_keystrokes = ()
+        self._configured_keys_cache = {}
+        logger.info("Window initialized with layout: %s", self.layoutManager.main_layout_name)
 
         self.listenerThread = None
-        self.currentCharacter = []
-        self.previousCharacter = []
+        # ASCII '1' (dit) / '2' (dah) per symbol, the same spelling as the layout codes
+        self.currentCharacter = bytearray()
+        self.previousCharacter = b''
         self.lastKeyDownTime = None
-        self.endCharacterTimer = None
+        # One timer per role, restarted rather than recreated on every key event
+        self._endCharTimer = QTimer(self)
+        self._endCharTimer.setSingleShot(True)
+        self._endCharTimer.timeout.connect(self.endCharacter)
+        self._fastMorseTimer = QTimer(self)
+        self._fastMorseTimer.setInterval(100)
+        self._fastMorseTimer.timeout.connect(self.repeatFastMorseKey)
+        self._repeatTimer = QTimer(self)
+        self._repeatTimer.setInterval(300)
+        self._repeatTimer.timeout.connect(self.repeatPreviousCharacter)
+        self._repeat_key = None  # Key and role held down in fast morse mode
+        self._repeat_role = None
         self.inputDisabled = False
         self.codeslayoutview = None
-        self.fast_morse_mode_timer = None
-        self.repeat_character_timer = None
+        # Layout views built since the last init(), by layout name, so switching back to one only shows it
+        self._layoutViews = {}
 
         self.repeaton = False
+        self._mouse_frame = None  # MouseMoveFrame of the key event batch being handled
+        self._modState = dict.fromkeys(MODIFIER_KEYS, False)  # Kept up to date by the listener's modifierChanged
 
         self.audioSelector = AudioDeviceSelector()
-
-    def load_default_config(self):
-        return DEFAULT_CONFIG.copy()
+        # Runs after device_changed has dropped the old device's cues
+        self.audioSelector.device_selector.currentIndexChanged.connect(self._preloadCues)
+        self._preloadCues()
+
+
+    def _reload_config_cache(self):
+        # Settings read on every key event, kept as typed attributes; call again whenever self.config is replaced
+        config = self.config
+        self._withsound = bool(config.get('withsound', True))
+        self._fastMorse = bool(config.get('fastMorseMode', False))
+        self._maxDitTimeMs = float(config.get('maxDitTime', 350))
+        self._maxDitNs = int(self._maxDitTimeMs * 1_000_000)  # Compared against perf_counter_ns() intervals
+        self._minLetterPauseMs = int(float(config.get('minLetterPause', 1000)))
+        self._ditWav = config.get('SoundDit', "res/dit_sound.wav")
+        self._dahWav = config.get('SoundDah', "res/dah_sound.wav")
+        self._typingWav = config.get('SoundTyping', "res/typing_sound.wav")
+        self._setKeyMode(config.get('keylen', 1))
+
+    def _preloadCues(self, *args):
+        # Decode the keystroke sounds up front so addDit/addDah/handleMorseCode only call play()
+        load_cue = self.audioSelector.load_cue
+        self._ditCue = load_cue(self._ditWav)
+        self._dahCue = load_cue(self._dahWav)
+        self._typingCue = load_cue(self._typingWav)
+
+    def _setKeyMode(self, keylen):
+        self._oneKeyMode = keylen == 1
+        self._threeKeyMode = keylen == 3
+
+    def _keyModeToggled(self, checked):
+        if checked:
+            self._setKeyMode(self.selected_keylen())
 
     def init(self):
-        self.currentCharacter = []
-        self.previousCharacter = []
+        self.currentCharacter.clear()
+        self.previousCharacter = b''
         self.repeaton = False
 
-        logging.debug("[Window init] Setting active layout to: %s", self.layoutManager.main_layout_name)
+        logger.debug("[Window init] Setting active layout to: %s", self.layoutManager.main_layout_name)
         self.layoutManager.set_active(self.layoutManager.main_layout_name)
-        logging.debug("[Window init] Active layout successfully set to: %s", self.layoutManager.active_layout_name)
+        logger.debug("[Window init] Active layout successfully set to: %s", self.layoutManager.active_layout_name)
         # Check for specific layout types that may require special handling
         if self.layoutManager.main_layout_name == 'typing':
-            self.abbreviations = load_abbreviations(os.path.join(user_data_dir,"abbreviations_en.txt"))
+            self.abbreviations = load_abbreviations(os.path.join(_USER_DATA_DIR, "abbreviations_en.txt"))
             self.typestate = TypeState(self.abbreviations)
         else:
             self.typestate = None
-        logging.debug(f"[Window init] layout that is active is: {self.layoutManager.main_layout_name} ")
+        logger.debug("[Window init] layout that is active is: %s ", self.layoutManager.main_layout_name)
+        self._dropLayoutViews()  # Built with the previous config
         self.codeslayoutview = CodesLayoutViewWidget(self.layoutManager.get_active_layout(), self.config)
+        self._layoutViews[self.layoutManager.active_layout_name] = self.codeslayoutview
         #  I Think this should be what we really need to do - but it's not working.
         # self.codeslayoutview = CodesLayoutViewWidget(self.layoutManager.get_active_layout(), self.config, self)
+        self.codeslayoutview.onFeedback(self._modState)
         self.codeslayoutview.show()
-        logging.debug(f"[Window init] Initial visibility status: {self.codeslayoutview.isVisible()}")
+        logger.debug("[Window init] Initial visibility status: %s", self.codeslayoutview.isVisible())
 
     def postInit(self):
         # Initialize components that depend on actions being available
         self.actions = self.configManager.actions
         self.keystrokes = self.configManager.keystrokes
         self.keystrokemap = self.configManager.keystrokemap
+        # Key names are looked up upper-cased, so fold the case of the map once here
+        self._keystrokemap_upper = {k.upper(): v for k, v in self.keystrokemap.items()}
+        self._filtered_keystrokes = tuple((key, self._keystrokemap_upper[key].name) for key in MORSE_KEYS
+                                          if key in self._keystrokemap_upper)
         #self.codeslayoutview = CodesLayoutViewWidget(self.layoutManager.get_active_layout(), self.config, self)
         self.createIconGroupBox()
         self.createActions()
@@ -889,6 +1523,9 @@ class Window(QDialog):
         self.SaveButton.clicked.connect(self.saveSettings)
         self.DeviceButton.clicked.connect(self.changeAudioDevice)
         self.withSound.clicked.connect(self.updateAudioProperties)
+        for radio, _ in self.KEYLEN_RADIOS:
+            getattr(self, radio).toggled.connect(self._keyModeToggled)
+        self._setKeyMode(self.selected_keylen())
         mainLayout = QVBoxLayout()
         mainLayout.addWidget(self.iconGroupBox)
         self.setLayout(mainLayout)
@@ -899,32 +1536,41 @@ class Window(QDialog):
 
 
     def get_configured_keys(self):
-        key_codes = []
         default_keys = {'keyone': 'SPACE', 'keytwo': 'ENTER', 'keythree': 'RIGHT CTRL'}
+        config_keys = tuple(self.config.get(key, default) for key, default in default_keys.items())
+        key_codes = self._configured_keys_cache.get(config_keys)
+        if key_codes is not None:
+            return key_codes
 
-        for key in ['keyone', 'keytwo', 'keythree']:
-            config_key = self.config.get(key, default_keys[key])
-            try:
-                # Ensure keys are fetched in uppercase, which seems to be the format used in keystrokemap
-                key_code = self.keystrokemap[config_key.upper()].key_code
-                key_codes.append(key_code)
-            except KeyError:
-                logging.error(f"Configured key '{config_key}' not found in keystroke map.")
-                raise ValueError(f"Configured key '{config_key}' is invalid.")
-            except AttributeError:
-                logging.error(f"'KeyStroke' object for '{config_key}' is missing 'key_code' attribute.")
-                raise
+        key_codes = tuple(self.key_code_for(config_key) for config_key in config_keys)
+        self._configured_keys_cache[config_keys] = key_codes
         return key_codes
 
+    def key_code_for(self, config_key):
+        try:
+            return self._keystrokemap_upper[config_key.upper()].key_code
+        except KeyError:
+            logger.error("Configured key '%s' not found in keystroke map.", config_key)
+            raise ValueError(f"Configured key '{config_key}' is invalid.")
+        except AttributeError:
+            logger.error("'KeyStroke' object for '%s' is missing 'key_code' attribute.", config_key)
+            raise
+
 
     def startKeyListener(self):
         key_codes = self.get_configured_keys()
-        logging.debug(f"[Window startKeyListener] Configured keys: {key_codes}")
+        logger.debug("[Window startKeyListener] Configured keys: %s", key_codes)
         if not self.listenerThread:
             self.listenerThread = KeyListenerThread(configured_keys=key_codes)
-            self.listenerThread.keyEvent.connect(self.handle_key_event)
+            self.listenerThread.keyEventsReady.connect(self._drainEvents)
+            self.listenerThread.modifierChanged.connect(self.onModifierChanged)
             self.listenerThread.start()
 
+    def onModifierChanged(self, key, state):
+        self._modState[key] = state
+        if self.codeslayoutview is not None:
+            self.codeslayoutview.onFeedback(self._modState)
+
 
     def updateAudioProperties(self):
         if self.withSound.isChecked():
@@ -935,45 +1581,72 @@ class Window(QDialog):
             self.iconComboBoxSoundDah.setEnabled(False)
 
     def changeLayout(self, layout_name):
-        logging.debug(f"[Window changeLayout] Attempting to change layout to: {layout_name}")
+        logger.debug("[Window changeLayout] Attempting to change layout to: %s", layout_name)
+        if layout_name == self.layoutManager.active_layout_name and self.codeslayoutview is not None:
+            return
         if layout_name in self.layoutManager.layouts:
+            previous_name = self.layoutManager.active_layout_name
             self.layoutManager.set_active(layout_name)
-            logging.debug(f"[Window changeLayout] Layout set active: {layout_name}")
+            logger.debug("[Window changeLayout] Layout set active: %s", layout_name)
+            cached = self._layoutViews.get(layout_name)
+            if cached is not None and cached is not self.codeslayoutview:
+                if self.codeslayoutview:
+                    self.codeslayoutview.hide()
+                self.codeslayoutview = cached
+                cached.reset()  # Still shows the code that switched away from it
+                cached.onFeedback(self._modState)
+                cached.show()
+                logger.debug("[Window changeLayout] Cached layout view shown")
+                return
+            if self.codeslayoutview and self.codeslayoutview.set_layout(self.layoutManager.get_active_layout()):
+                # The view now shows this layout instead of the previous one
+                if self._layoutViews.get(previous_name) is self.codeslayoutview:
+                    del self._layoutViews[previous_name]
+                self._layoutViews[layout_name] = self.codeslayoutview
+                self.codeslayoutview.onFeedback(self._modState)
+                self.codeslayoutview.show()
+                logger.debug("[Window changeLayout] Layout view relabelled in place")
+                return
             if self.codeslayoutview:
                 self.codeslayoutview.hide()
-                self.codeslayoutview.deleteLater()
-                logging.debug("[Window changeLayout] Previous layout view deleted")
+                logger.debug("[Window changeLayout] Previous layout view hidden")
             self.codeslayoutview = CodesLayoutViewWidget(self.layoutManager.get_active_layout(), self.config)
+            self._layoutViews[layout_name] = self.codeslayoutview
+            self.codeslayoutview.onFeedback(self._modState)
             self.codeslayoutview.show()
-            logging.debug(f"[Window changeLayout] CodesLayoutViewWidget is visible: {self.codeslayoutview.isVisible()}")
-            logging.debug(f"[Window changeLayout] Window is visible: {self.isVisible()}")
+            logger.debug("[Window changeLayout] CodesLayoutViewWidget is visible: %s", self.codeslayoutview.isVisible())
+            logger.debug("[Window changeLayout] Window is visible: %s", self.isVisible())
 
             # Explicitly call show() on both the widget and the window
             # self.codeslayoutview.show()
             # self.show()
         else:
-            logging.error(f"[Window changeLayout] Layout change failed: {layout_name} not found.")
+            logger.error("[Window changeLayout] Layout change failed: %s not found.", layout_name)
 
 
 
     def getTypeStatePredictions(self):
-        logging.debug(f"[Window] getTypeStatePredictions")
+        logger.debug("[Window] getTypeStatePredictions")
         if self.typestate:
             return self.typestate.getpredictions()
         return []
 
+    def selected_keylen(self):
+        return next((n for radio, n in self.KEYLEN_RADIOS if getattr(self, radio).isChecked()), 3)
+
     def collect_config(self):
+        keylen = self.selected_keylen()
         config = {
-            'keylen': self.keySelectionRadioOneKey.isChecked() and 1 or self.keySelectionRadioTwoKey.isChecked() and 2 or 3,
-            'keyone': self.iconComboBoxKeyOne.itemData(self.iconComboBoxKeyOne.currentIndex()),
-            'keytwo': self.iconComboBoxKeyTwo.itemData(self.iconComboBoxKeyTwo.currentIndex()),
-            'keythree': self.iconComboBoxKeyThree.itemData(self.iconComboBoxKeyThree.currentIndex()),
+            'keylen': keylen,
+            'keyone': self.iconComboBoxKeyOne.currentData(),
+            'keytwo': self.iconComboBoxKeyTwo.currentData(),
+            'keythree': self.iconComboBoxKeyThree.currentData(),
             'maxDitTime': float(self.maxDitTimeEdit.text()),
             'minLetterPause': float(self.minLetterPauseEdit.text()),
             'withsound': self.withSound.isChecked(),
-            'SoundDit': self.iconComboBoxSoundDit.itemData(self.iconComboBoxSoundDit.currentIndex()),
-            'SoundDah': self.iconComboBoxSoundDah.itemData(self.iconComboBoxSoundDah.currentIndex()),
-            'SoundTyping': self.iconComboBoxSoundTyping.itemData(self.iconComboBoxSoundTyping.currentIndex()),
+            'SoundDit': self.iconComboBoxSoundDit.currentData(),
+            'SoundDah': self.iconComboBoxSoundDah.currentData(),
+            'SoundTyping': self.iconComboBoxSoundTyping.currentData(),
             'debug': self.withDebug.isChecked(),
             'off': False,
             'fontsizescale': float(self.fontSizeScaleEdit.text()),
@@ -983,7 +1656,8 @@ class Window(QDialog):
             'winyaxis': "top" if self.keyWinPosYTopRadio.isChecked() else "bottom",
             'winposx': self.keyWinPosXEdit.text(),
             'winposy': self.keyWinPosYEdit.text(),
-            'fastMorseMode': self.fastMorseModeCheckbox.isChecked() if self.keySelectionRadioOneKey.isChecked() is False else False,
+            'fastMorseMode': self.fastMorseModeCheckbox.isChecked() if keylen != 1 else False,
+            'schema_version': CONFIG_SCHEMA_VERSION,
         }
         return config
 
@@ -991,9 +1665,10 @@ class Window(QDialog):
         key_one = self.iconComboBoxKeyOne.currentData()
         key_two = self.iconComboBoxKeyTwo.currentData()
         key_three = self.iconComboBoxKeyThree.currentData()
-        warn_user = (self.keySelectionRadioTwoKey.isChecked() and key_one == key_two) or (self.keySelectionRadioThreeKey.isChecked() and (key_one == key_two or key_one == key_three or key_two == key_three))
+        keylen = self.selected_keylen()
+        active_keys = [key for key, n in zip((key_one, key_two, key_three), (1, 2, 3)) if n <= keylen]
 
-        if warn_user:
+        if len(set(active_keys)) != len(active_keys):
             QMessageBox.warning(self, "MorseWriter",
                                     "Input keys can not be similar, please make sure using different keys.")
             return
@@ -1003,7 +1678,10 @@ class Window(QDialog):
             QMessageBox.information(self, "MorseWriter",
                                     "The program will run in the system tray. To terminate the program, choose <b>Quit</b> in the context menu of the system tray entry.")
             self.hide()
+        self._configured_keys_cache.clear()
         self.config = self.collect_config()
+        self._reload_config_cache()
+        self._preloadCues()
         self.init()
         if not self.listenerThread:
             self.startKeyListener()
@@ -1029,16 +1707,17 @@ class Window(QDialog):
             self.showMessage()
 
     def showMessage(self):
-        icon = QSystemTrayIcon.MessageIcon(self.typeComboBox.itemData(self.typeComboBox.currentIndex()))
+        icon = QSystemTrayIcon.MessageIcon(self.typeComboBox.currentData())
         self.trayIcon.showMessage(self.titleEdit.text(), self.bodyEdit.toPlainText(), icon, self.durationSpinBox.value() * 1000)
 
     def mkKeyStrokeComboBox (self, items, currentkey, valuedict=None):
         box = QComboBox()
+        values = []
         for key, val in items:
-            eval = valuedict[val] if valuedict is not None else val
-            box.addItem(key, eval)
+            value = valuedict[val] if valuedict is not None else val
+            values.append(value)
+            box.addItem(key, value)
         try:
-            values = list(map(lambda a:valuedict[a[1]] if valuedict is not None else a[1], items))
             box.setCurrentIndex(values.index(currentkey))
         except ValueError:
             pass
@@ -1063,9 +1742,8 @@ class Window(QDialog):
 
         inputKeyComboBoxesLayout = QHBoxLayout()
 
-        # Filter the keystrokes to only include those keys that are specified in morse_keys
-        morse_keys = ["SPACE", "ENTER", "ONE", "TWO", "Z", "F8", "F9", "RCTRL", "LCTRL", "RSHIFT", "LSHIFT", "ALT", "CTRL"]
-        filtered_keystrokes = [(key, self.keystrokemap[key].name) for key in morse_keys if key in self.keystrokemap]
+        # Only the keys in MORSE_KEYS are offered, filtered once in postInit
+        filtered_keystrokes = self._filtered_keystrokes
 
         # Set up the combo box for the first key using the filtered list
         self.iconComboBoxKeyOne = self.mkKeyStrokeComboBox(
@@ -1101,8 +1779,8 @@ class Window(QDialog):
         self.keySelectionRadioTwoKey.clicked.connect(self.updateFastMorseModeAvailability)
         self.keySelectionRadioThreeKey.clicked.connect(self.updateFastMorseModeAvailability)
 
-        for index, name in [[1,'One'], [2,'Two'], [3,'Three']]:
-            getattr(self, 'keySelectionRadio%sKey'%(name)).setChecked(self.config.get('keylen', 1) == index)
+        for radio, index in self.KEYLEN_RADIOS:
+            getattr(self, radio).setChecked(self.config.get('keylen', 1) == index)
 
         maxDitTimeLabel = QLabel("MaxDitTime (ms):")
         self.maxDitTimeEdit = QLineEdit(str(self.config.get("maxDitTime", "350")))
@@ -1227,7 +1905,10 @@ class Window(QDialog):
             self.fastMorseModeCheckbox.setEnabled(True)
 
     def saveSettings (self):
+        self._configured_keys_cache.clear()
         self.config = self.collect_config()
+        self._reload_config_cache()
+        self._preloadCues()
         self.configManager.save_config(self.config)
 
     def changeAudioDevice(self):
@@ -1240,15 +1921,27 @@ class Window(QDialog):
             self.config['off'] = True
 
     def stopIt(self):
-        logging.debug("Stopping components...")
+        logger.debug("Stopping components...")
         if self.listenerThread is not None:
             self.listenerThread.stop()
             self.listenerThread.wait()
             self.listenerThread = None
+        # The next listener starts with nothing held, keep the view in step with it
+        self._modState = dict.fromkeys(MODIFIER_KEYS, False)
+        # No release will arrive once the listener is gone, so don't leave a key repeating
+        self._stopRepeat()
+        self._repeatTimer.stop()
+        self._dropLayoutViews()
+        logger.debug("All components stopped.")
+
+    def _dropLayoutViews(self):
+        for view in self._layoutViews.values():
+            view.hide()
+            view.deleteLater()
+        self._layoutViews.clear()
         if self.codeslayoutview is not None:
             self.codeslayoutview.hide()
             self.codeslayoutview = None
-        logging.debug("All components stopped.")
 
     def backToSettings (self):
         self.showNormal()
@@ -1272,23 +1965,34 @@ class Window(QDialog):
         self.trayIcon = QSystemTrayIcon(self)
         self.trayIcon.setContextMenu(self.trayIconMenu)
 
-    def handle_key_event(self, key, is_press, role):
+    def _drainEvents(self):
+        if self.listenerThread is not None:
+            self.handle_key_event_batch(self.listenerThread.drain_events())
+
+    def handle_key_event_batch(self, events):
+        self._mouse_frame = frame = MouseMoveFrame()
+        try:
+            for key, is_press, role, timestamp in events:
+                self.handle_key_event(key, is_press, role, timestamp)
+        finally:
+            self._mouse_frame = None
+            frame.flush()
+
+    def handle_key_event(self, key, is_press, role, timestamp=None):
         # logging.debug(f"[handle_key_event] t={key}, Pressed={is_press}")
         try:
             if is_press:
-                self.on_press(key, role)
+                self.on_press(key, role, timestamp)
             else:
-                self.on_release(key, role)
+                self.on_release(key, role, timestamp)
         except Exception as e:
-            logging.warning(f"[handle_key_event] Error handling key event: {e}")
+            logger.warning("[handle_key_event] Error handling key event: %s", e)
 
 
-    def on_press(self, key, role):
+    def on_press(self, key, role, timestamp=None):
         try:
             self.repeaton = False
-            if self.repeat_character_timer:
-                self.repeat_character_timer.stop()
-                self.repeat_character_timer = None
+            self._repeatTimer.stop()
 
             # Handle disable toggle (adapt keys according to your config)
             if self.check_disable_combination(key):
@@ -1302,16 +2006,16 @@ class Window(QDialog):
             if self.lastKeyDownTime is not None:
                 return
 
-            # Start timing the key press
-            self.lastKeyDownTime = time.time()
-            logging.debug(f"[Window on_press] Key pressed: {key}")
+            # Start timing the key press, from when the listener saw it if known
+            self.lastKeyDownTime = time.perf_counter_ns() if timestamp is None else timestamp
+            logger.debug("[Window on_press] Key pressed: %s", key)
 
-            if self.config.get('fastMorseMode', False) and not self.keySelectionRadioOneKey.isChecked():
-                self.fast_morse_mode_timer = QTimer(self)
-                self.fast_morse_mode_timer.timeout.connect(lambda: self.repeat_key(key, role))
-                self.fast_morse_mode_timer.start(100)  # Adjust the interval as needed
+            if self._fastMorse and not self._oneKeyMode:
+                self._repeat_key = key
+                self._repeat_role = role
+                self._fastMorseTimer.start()
 
-            if not self.keySelectionRadioOneKey.isChecked():
+            if not self._oneKeyMode:
                 # Check for dit or dah or end based on role
                 if role == 0:
                     self.addDit()
@@ -1321,7 +2025,18 @@ class Window(QDialog):
                     self.endCharacter()
 
         except Exception as e:
-            logging.warning(f"[on_press] Error on key press: {e}")
+            logger.warning("[on_press] Error on key press: %s", e)
+
+    def repeatFastMorseKey(self):
+        self.repeat_key(self._repeat_key, self._repeat_role)
+
+    def _stopRepeat(self):
+        self._fastMorseTimer.stop()
+        self._repeat_key = None
+        self._repeat_role = None
+
+    def repeatPreviousCharacter(self):
+        self.handleMorseCode(self.previousCharacter)
 
     def repeat_key(self, key, role):
         if role == 0:
@@ -1332,119 +2047,112 @@ class Window(QDialog):
             self.endCharacter()
 
 
+    @property
+    def sharedKeyState(self):
+        # Modifier state as last seen by the listener's hooks, falls back to the GUI copy when not listening
+        listener = self.listenerThread
+        return listener.shared_key_state if listener is not None else self._modState
+
     def check_disable_combination(self, key):
         # Example logic, replace with actual keys and states
-        return key == 'P' and self.key_state['CTRL'] and self.key_state['SHIFT']
+        if key != 'P':
+            return False
+        state = self.sharedKeyState
+        return state['ctrl'] and state['shift']
 
-    def on_release(self, key, role):
+    def on_release(self, key, role, timestamp=None):
         try:
-            if self.fast_morse_mode_timer:
-                self.fast_morse_mode_timer.stop()
-                self.fast_morse_mode_timer = None
+            self._stopRepeat()
 
             if self.lastKeyDownTime is not None:
-                duration = (time.time() - self.lastKeyDownTime) * 1000  # Duration in milliseconds
+                released = time.perf_counter_ns() if timestamp is None else timestamp
+                duration_ns = released - self.lastKeyDownTime
                 self.lastKeyDownTime = None  # Reset key down time
 
-                if self.keySelectionRadioOneKey.isChecked():
+                if self._oneKeyMode:
                     # Check for dit or dah based on duration
-                    maxDitTime = float(self.config.get('maxDitTime', 350))
-                    if duration < maxDitTime:
+                    if duration_ns < self._maxDitNs:
                         self.addDit()
                     else:
                         self.addDah()
 
-                if self.keySelectionRadioOneKey.isChecked() or self.keySelectionRadioTwoKey.isChecked():
+                if not self._threeKeyMode:
                     # Start timer for end character sequence
                     self.startEndCharacterTimer()
 
-                logging.debug(f"[Window on_release] Key released: {key}, duration: {duration}ms")
+                logger.debug("[Window on_release] Key released: %s, duration: %.1fms", key, duration_ns / 1e6)
 
         except Exception as e:
-            logging.warning(f"[on_release] Error on key release: {e}")
+            logger.warning("[on_release] Error on key release: %s", e)
 
 
     def addDit(self):
-        self.currentCharacter.append(1)
-        if self.config['withsound']:
-            # play("res/dit_sound.wav") #nava
-            self.audioSelector.play_audio("res/dit_sound.wav")
+        self.currentCharacter.append(0x31)  # '1'
+        if self._withsound and self._ditCue is not None:
+            self._ditCue.play()
         self.codeslayoutview.Dit()
 
     def addDah(self):
-        self.currentCharacter.append(2)
-        if self.config['withsound']:
-            # play("res/dah_sound.wav") #nava
-            self.audioSelector.play_audio("res/dah_sound.wav")
+        self.currentCharacter.append(0x32)  # '2'
+        if self._withsound and self._dahCue is not None:
+            self._dahCue.play()
         self.codeslayoutview.Dah()
 
 
     def startEndCharacterTimer(self):
-        if self.endCharacterTimer is not None:
-            self.endCharacterTimer.stop()  # Stop existing timer
-        self.endCharacterTimer = QTimer()
-        self.endCharacterTimer.setSingleShot(True)
-        self.endCharacterTimer.timeout.connect(self.endCharacter)
-        self.endCharacterTimer.start(int(self.config['minLetterPause']))  # Configure delay from settings
-        logging.debug(f"[startEndCharacter] Timer restarted with a delay of {self.config['minLetterPause']} ms")
+        self._endCharTimer.start(self._minLetterPauseMs)  # Restarts it if already running
+        logger.debug("[startEndCharacter] Timer restarted with a delay of %s ms", self._minLetterPauseMs)
 
 
     def endCharacter(self):
-        logging.debug(f"[Window] endCharacter")
+        logger.debug("[Window] endCharacter")
 
-        if self.endCharacterTimer is not None:
-            self.endCharacterTimer.stop()
-            self.endCharacterTimer = None
+        self._endCharTimer.stop()
 
         self.handleMorseCode(self.currentCharacter)
 
         if self.repeaton:
-            if not self.previousCharacter == []:
-                logging.debug(f"[endCharacter] repeat mode is ON for Morse Code: {self.previousCharacter}")
-                self.repeat_character_timer = QTimer(self)
-                self.repeat_character_timer.timeout.connect(lambda: self.handleMorseCode(self.previousCharacter))
-                self.repeat_character_timer.start(300)
+            if self.previousCharacter:
+                logger.debug("[endCharacter] repeat mode is ON for Morse Code: %s", self.previousCharacter)
+                self._repeatTimer.start()
             else:
-                logging.debug(f"[endCharacter] repeat mode is ON but no previous Morse Code was found")
+                logger.debug("[endCharacter] repeat mode is ON but no previous Morse Code was found")
         else:
-            self.previousCharacter = self.currentCharacter
+            self.previousCharacter = bytes(self.currentCharacter)
 
-        self.currentCharacter = []  # Reset after handling
+        self.currentCharacter.clear()  # Reset after handling
         self.codeslayoutview.reset()
 
     def enableRepeatMode(self):
         if self.config.get('debug', False):
-            logging.info("repeat ON")
+            logger.info("repeat ON")
         self.repeaton = True
-        logging.debug(f"[Window] enableRepeatMode: repeat={self.repeaton}, previous code={self.previousCharacter}")
+        logger.debug("[Window] enableRepeatMode: repeat=%s, previous code=%s", self.repeaton, self.previousCharacter)
 
     def handleMorseCode(self, character):
-        morse_code = "".join(str(char) for char in character)
-        if morse_code == "":
-            logging.warning(f"[handleMorseCode] No action found for Morse code: {morse_code}")
+        # character holds ASCII '1'/'2' bytes, one C-level decode gives the code as in the layouts
+        morse_code = character.decode('ascii')
+        if not character:
+            logger.warning("[handleMorseCode] No action found for Morse code: %s", morse_code)
             return
 
         try:
-            active_layout = self.layoutManager.get_active_layout()
-            items = active_layout.get('items', [])
-            item = next((item for item in items if item.get('code') == morse_code), None)
-            print(item)
-
-            if item and '_action' in item:
-                action = item['_action']
-                if hasattr(action, 'perform') and callable(action.perform):
-                    action.perform()
-                    logging.info(f"[handleMorseCode] Action performed for Morse code: {morse_code}")
-                    if self.config['withsound']:
-                        # play(self.config.get('SoundTyping', 'res/typing_sound.wav'))  # Play typing sound
-                        self.audioSelector.play_audio(self.config.get('SoundTyping', 'res/typing_sound.wav'))
-                else:
-                    logging.error(
-                        f"[handleMorseCode] '_action' does not have a callable 'perform' method for Morse code: {morse_code}")
+            entry = self.layoutManager.get_perform(encode(character))
+            if entry is None:
+                logger.warning("[handleMorseCode] No action found for Morse code: %s", morse_code)
+                return
+            perform, takes_frame = entry
+            if takes_frame:
+                perform(self._mouse_frame)
             else:
-                logging.warning(f"[handleMorseCode] No action found for Morse code: {morse_code}")
+                if self._mouse_frame is not None:
+                    self._mouse_frame.flush()
+                perform()
+            logger.info("[handleMorseCode] Action performed for Morse code: %s", morse_code)
+            if self._withsound and self._typingCue is not None:
+                self._typingCue.play()
         except Exception as e:
-            logging.error(f"[handleMorseCode] Failed to perform action for Morse code: {morse_code}. Error: {e}")
+            logger.error("[handleMorseCode] Failed to perform action for Morse code: %s. Error: %s", morse_code, e)
 
 class CodeRepresentation(QWidget):
     def __init__(self, parent, code, item, c1, config):
@@ -1463,6 +2171,7 @@ class CodeRepresentation(QWidget):
         self.codeline.setContentsMargins(0, 0, 0, 0)
         self.codeline.move(20, 30)
         self.code = self.codetocode(code)
+        self.codetext = self.code.decode('ascii')  # For display
         vlayout.setContentsMargins(5, 5, 5, 5)
         vlayout.addWidget(self.character)
         vlayout.addWidget(self.codeline)
@@ -1475,16 +2184,27 @@ class CodeRepresentation(QWidget):
         self.is_enabled = True
         self.character.setText(item['_action'].getlabel())
         self.toggled = False
+        # The config does not change while the layout view exists, so the font sizes are baked
+        # into the HTML templates once; updateView only fills in the colours and text
+        char_font = int(3.0 * config['fontsizescale'] / 100)
+        code_font = int(5.0 * config['fontsizescale'] / 100)
+        self._char_tmpl = ("<font style='background-color:%%s;color:%%s;font-weight:bold;' "
+                           "size='%d'>%%s</font>" % char_font)
+        self._code_tmpl = ("<font size='%d'><font color='green'>%%s</font>"
+                           "<font color='%%s'>%%s</font></font>" % code_font)
+        self._upperchars = config['upperchars']
+        self._last_state = None
         self.updateView()
 
     def item_label(self):
         action = self.item.get('_action')
         return action.getlabel() if action is not None else ""
 
+    _CODE_TABLE = bytes.maketrans(b'12', b'.-')
+
     def codetocode(self, code):
-        toReturn = code.replace('1', '.')
-        toReturn = toReturn.replace('2', '-')
-        return toReturn;
+        # bytes, so Dit/Dah compare ints instead of one-character strings
+        return code.encode('ascii').translate(self._CODE_TABLE)
 
     def enable(self):
         self.is_enabled = True
@@ -1497,18 +2217,23 @@ class CodeRepresentation(QWidget):
     def updateView (self):
         enabled = self.is_enabled
         codeselectrange = self.disabledchars if enabled  and self.disabledchars > 0 else 0
+        toggled = self.toggled
+        label = self.item_label()
+        # Most widgets are left as they were by a dit/dah, don't make Qt relayout those
+        state = (enabled, toggled, codeselectrange, label)
+        if state == self._last_state:
+            return
+        self._last_state = state
         self.character.setDisabled(not enabled)
         self.codeline.setDisabled(not enabled)
-        charfontsize = int(3.0 * self.config['fontsizescale'] / 100)
-        codefontsize = int(5.0 * self.config['fontsizescale'] / 100)
-        toggled = self.toggled
-        self.character.setText("<font style='background-color:{bgcolor};color:{color};font-weight:bold;' size='{fontsize}'>{text}</font>"
-                               .format(color='blue' if enabled else 'lightgrey',
-                                       text=(self.item_label().upper() if self.config['upperchars'] else self.item_label()),
-                                       fontsize=charfontsize, bgcolor="yellow" if toggled else "none"))
-        self.codeline.setText("<font size='{fontsize}'><font color='green'>{selecttext}</font><font color='{color}'>{text}</font></font>"
-                              .format(text=self.code[codeselectrange:], selecttext=self.code[:codeselectrange],
-                                      color='red' if enabled else 'lightgrey', fontsize=codefontsize))
+        if self._upperchars:
+            label = label.upper()
+        bgcolor = "yellow" if toggled else "none"
+        color = 'blue' if enabled else 'lightgrey'
+        self.character.setText(self._char_tmpl % (bgcolor, color, label))
+        color = 'red' if enabled else 'lightgrey'
+        codetext = self.codetext
+        self.codeline.setText(self._code_tmpl % (codetext[:codeselectrange], color, codetext[codeselectrange:]))
 
 
     def enabled(self):
@@ -1519,26 +2244,6 @@ class CodeRepresentation(QWidget):
         self.disabledchars = -1
         self.tickDitDah()
 
-    def Dit(self):
-        #logging.debug(f"[CodeRepresentation] Attempting Dit. Enabled: {self.is_enabled}, Disabled Chars: {self.disabledchars}, Code Length: {len(self.code)}")
-        if (self.enabled()):
-            if ((self.disabledchars < len(self.code)) and self.code[self.disabledchars] == '.'):
-                self.tickDitDah()
-                #logging.debug("[CodeRepresentation] Dit successful.")
-            else:
-                self.disable()
-                #logging.debug("[CodeRepresentation] Dit failed - disabling.")
-
-    def Dah(self):
-        #logging.debug(f"[CodeRepresentation] Attempting Dah. Enabled: {self.is_enabled}, Disabled Chars: {self.disabledchars}, Code Length: {len(self.code)}")
-        if (self.enabled()):
-            if ((self.disabledchars < len(self.code)) and self.code[self.disabledchars] == '-'):
-                self.tickDitDah()
-                #logging.debug("[CodeRepresentation] Dah successful.")
-            else:
-                self.disable()
-                #logging.debug("[CodeRepresentation] Dah failed - disabling.")
-
     def tickDitDah(self):
         self.disabledchars += 1
         if (self.disabledchars > len(self.code)):
@@ -1593,31 +2298,63 @@ class CodesLayoutViewWidget(QWidget):
         self.setWindowFlags(Qt.WindowStaysOnTopHint)
         self.adjustPosition()
         self.escapeMorseModeListener = KeyCombinationListener()
-        logging.debug(f"[CodesLayoutViewWidget __init__]")
-
-    def onFeedback (self):
-        for keyname in ("ALT", "SHIFT", "CTRL"):
-            coderep = self.keystroke_crs_map.get(keyname, None)
-            if coderep is not None:
-                coderep.toggled = get_keystroke_state(keyname)['down']
-                coderep.updateView()
-        coderep = self.keystroke_crs_map.get("CAPSLOCK", None)
-        if coderep is not None:
-            key = coderep.item['_action'].key
-            coderep.toggled = get_keystroke_state("CAPSLOCK")["locked"]# (state & 1) == 1
+        logger.debug("[CodesLayoutViewWidget __init__]")
+
+    def onFeedback (self, mod_state):
+        # Brings the modifier coderep widgets in line with mod_state, touching only the ones that changed
+        snapshot = tuple(mod_state.values())
+        last = self._lastModSnap
+        if snapshot == last:
+            return
+        self._lastModSnap = snapshot
+        for i, (keyname, state) in enumerate(mod_state.items()):
+            if last is None or last[i] != state:
+                self.setKeystrokeToggled(keyname, state)
+
+    def setKeystrokeToggled(self, keyname, toggled):
+        coderep = self.keystroke_crs_map.get(keyname)
+        if coderep is not None and coderep.toggled != toggled:
+            coderep.toggled = toggled
             coderep.updateView()
 
     def changeLayout(self, layout_name):
-        logging.debug(f"[CodesLayoutViewWidget changeLayout] Changing to  {layout_name} ")
+        logger.debug("[CodesLayoutViewWidget changeLayout] Changing to  %s ", layout_name)
         new_layout = self.parent().layoutManager.layouts.get(layout_name, None)
-        logging.debug(f"[CodesLayoutViewWidget changeLayout] Changing to to {layout_name} ")
+        logger.debug("[CodesLayoutViewWidget changeLayout] Changing to to %s ", layout_name)
         if new_layout:
             self.layout = new_layout
             self.setupLayout(new_layout)
             self.show()
         else:
-            logging.error(f"[CodesLayoutViewWidget changeLayout] Layout {layout_name} not found.")
+            logger.error("[CodesLayoutViewWidget changeLayout] Layout %s not found.", layout_name)
 
+    @staticmethod
+    def layout_shape(layout):
+        return layout.get('column_len'), tuple((item.get('code'), bool(item.get('emptyspace')))
+                                               for item in layout.get('items', []))
+
+    def set_layout(self, layout):
+        """
+        Shows another layout by relabelling the current widgets. Only works for a layout with
+        the same codes in the same places; returns False, changing nothing, otherwise.
+        None of the shipped layouts share a shape, so this only applies to user-edited layouts.
+        """
+        if self.layout_shape(layout) != self.layout_shape(self.layout):
+            return False
+        self.layout = layout
+        self.keystroke_crs_map = {}
+        self._lastModSnap = None  # Different widgets show the modifiers now
+        for item in layout['items']:
+            coderep = self.crs.get(item['code'])
+            if coderep is None:
+                continue
+            coderep.item = item
+            # Modifier highlighting belongs to the old label, onFeedback sets it again for the new ones
+            coderep.toggled = False
+            if isinstance(item['_action'], ActionKeyStroke):
+                self.keystroke_crs_map[item['_action'].name] = coderep
+            coderep.updateView()
+        return True
 
     def adjustPosition(self):
         #logging.debug("Current config: %s", self.config)
@@ -1640,36 +2377,30 @@ class CodesLayoutViewWidget(QWidget):
         self.move(x_position, y_position)
 
     def setupLayout(self, layout):
-        logging.debug(f"[CodesLayoutViewWidget setupLayout] Setting up {layout} ")
-        self.vlayout = QVBoxLayout()
-        self.setLayout(self.vlayout)
-        hlayout = QHBoxLayout()
-        hlayout.setContentsMargins(0, 0, 0, 0)
-        self.vlayout.addLayout(hlayout)
-
+        logger.debug("[CodesLayoutViewWidget setupLayout] Setting up %s ", layout)
         self.keystroke_crs_map = {}
+        self._lastModSnap = None  # Modifier state last passed to onFeedback
         self.crs = {}
-        x = 0
         perrow = layout['column_len']
 
+        # Create all the widgets first, split into rows of column_len items (empty spaces included)
+        rows = [[]]
         for item in layout['items']:
-            logging.debug(f"LAYOUT Item: {item}")
-            if 'emptyspace' not in item or not item['emptyspace']:
-                coderep = CodeRepresentation(None, item['code'], item, "Green", self.config)
-                # Check if '_action' is an instance of ActionKeyStroke
-                if isinstance(item['_action'], ActionKeyStroke):
-                    # Use the .name property from ActionKeyStroke
-                    label = item['_action'].label
-                    key_name = item['_action'].name
-                    self.keystroke_crs_map[key_name] = coderep
-                self.crs[item['code']] = coderep
-                hlayout.addWidget(coderep)
-            x += 1
-            if x >= perrow:
-                x = 0
-                hlayout = QHBoxLayout()
-                hlayout.setContentsMargins(0, 0, 0, 0)
-                self.vlayout.addLayout(hlayout)
+            logger.debug("LAYOUT Item: %s", item)
+            if len(rows[-1]) >= perrow:
+                rows.append([])
+            if 'emptyspace' in item and item['emptyspace']:
+                rows[-1].append(None)
+                continue
+            coderep = CodeRepresentation(None, item['code'], item, "Green", self.config)
+            # Check if '_action' is an instance of ActionKeyStroke
+            if isinstance(item['_action'], ActionKeyStroke):
+                # Use the .name property from ActionKeyStroke
+                self.keystroke_crs_map[item['_action'].name] = coderep
+            self.crs[item['code']] = coderep
+            rows[-1].append(coderep)
+        if len(rows[-1]) >= perrow:
+            rows.append([])  # A full last row was followed by an empty one before too
 
         if self.config['withsound']:
             self.sound_indicator.set_color("green")
@@ -1678,20 +2409,59 @@ class CodesLayoutViewWidget(QWidget):
             self.sound_indicator.set_color("red")
             self.status_bar.showMessage("Sound Mode Disabled")
 
-        self.vlayout.addWidget(self.status_bar)
+        # Then fill the layout while it is detached and install it once, so the geometry is only
+        # worked out for the finished grid rather than after every addWidget
+        self.setUpdatesEnabled(False)
+        try:
+            self.vlayout = QVBoxLayout()
+            for row in rows:
+                hlayout = QHBoxLayout()
+                hlayout.setContentsMargins(0, 0, 0, 0)
+                for coderep in row:
+                    if coderep is not None:
+                        hlayout.addWidget(coderep)
+                self.vlayout.addLayout(hlayout)
+            self.vlayout.addWidget(self.status_bar)
+            self.setLayout(self.vlayout)
+        finally:
+            self.setUpdatesEnabled(True)
+        # For each symbol, the codes having it at each position; codes don't change after this
+        max_depth = max(map(len, self.crs), default=0)
+        self._depthTables = {
+            symbol: [frozenset(code for code in self.crs if len(code) > depth and code[depth] == symbol)
+                     for depth in range(max_depth)]
+            for symbol in '12'
+        }
+        # Codes still matching the symbols entered so far, and how many symbols that is
+        self._active = set(self.crs)
+        self._depth = 0
 
 
     def Dit(self):
-        for item in self.crs.values():
-            item.Dit()
+        self.advance('1')
 
     def Dah(self):
-        for item in self.crs.values():
-            item.Dah()
+        self.advance('2')
+
+    def advance(self, symbol):
+        # Codes that were ruled out earlier stay disabled, only the ones still matching are visited
+        depth = self._depth
+        table = self._depthTables[symbol]
+        active = self._active
+        matching = active & table[depth] if depth < len(table) else set()
+        crs = self.crs
+        for code in active - matching:
+            crs[code].disable()
+        for code in matching:
+            crs[code].tickDitDah()
+        self._active = matching
+        self._depth = depth + 1
 
     def reset(self):
         for item in self.crs.values():
             item.reset()
+        self._active = set(self.crs)
+        self._depth = 0
 
     def closeEvent(self, event):
         window.backToSettings()
@@ -1707,15 +2477,6 @@ class CodesLayoutViewWidget(QWidget):
     def updateSoundSupport(self):
         return True
 
-def get_keystroke_state(name):
-    state = {
-        "down": keyboard.is_pressed(name)
-    }
-    # Special case handling for CAPS LOCK which needs to check toggle state
-    if name.lower() == "capslock":
-        state["locked"] = keyboard.is_pressed('caps lock')
-    return state
-
 
 class CustomApplication(QApplication):
     def notify(self, receiver, event):
@@ -1724,7 +2485,7 @@ class CustomApplication(QApplication):
 
 
 if __name__ == '__main__':
-    user_data_dir = get_user_data_dir()
+    user_data_dir = _USER_DATA_DIR
     os.makedirs(user_data_dir, exist_ok=True)
     app = CustomApplication(sys.argv)
 